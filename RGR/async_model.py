@@ -0,0 +1,432 @@
+import asyncio
+import time
+import uuid
+
+import numpy as np
+from psycopg import errors
+from psycopg_pool import PoolTimeout
+from database import create_async_pool
+from config import PAGE_SIZE, STREAM_ITERSIZE, GENERATION_CHUNK_ROWS, SEARCH_CACHE
+import vectorized
+from fk_sampler import AsyncFKSampler
+from metrics import QueryMetrics
+from statements import StatementRegistry
+from cache import SearchCache
+from model import (SEARCH_TABLES, TABLE_COLUMNS, TRIP_SEARCH_QUERY, TRIP_SEARCH_TABLE_QUERY, DRIVER_GENERATION_QUERY,
+                   ROUTE_GENERATION_QUERY, CUSTOMER_GENERATION_QUERY, SERVICE_GENERATION_QUERY, page_query,
+                   search_key)
+
+
+# Кешований результат пошуку віддається тим самим інтерфейсом (async for), що й потік з БД
+async def iter_rows(rows):
+    for row in rows:
+        yield row
+
+
+# Наступна порція колонок, вже перетворена на блок тексту COPY, або None в кінці
+def next_copy_block(column_chunks):
+    chunk = next(column_chunks, None)
+    if chunk is None:
+        return None
+    return len(chunk[0]), vectorized.to_copy_text(chunk)
+
+
+# Асинхронна версія Model з тим самим набором методів поверх AsyncConnectionPool:
+# кожен метод — корутина, тож один цикл подій може виконувати багато запитів одночасно
+# (до POOL_PARAMS["max_size"] паралельно, решта чекає на з'єднання з пулу).
+# На Windows psycopg потребує SelectorEventLoop:
+#     asyncio.run(main(), loop_factory=asyncio.SelectorEventLoop)
+class AsyncModel:
+    def __init__(self):
+        self.pool = None
+        self.fk_sampler = None
+        self.metrics = QueryMetrics()
+        self.statements = StatementRegistry()
+        # Кеш спільний для всіх корутин: звернення до нього не містять await, тож не перемежовуються
+        self.search_cache = SearchCache(**SEARCH_CACHE)
+        self.use_search_table = False
+
+    async def connect(self):
+        try:
+            self.pool = await create_async_pool()
+        except Exception as e:
+            self.pool = None
+            print(f"Помилка підключення до БД: {e}")
+        self.fk_sampler = AsyncFKSampler(self.pool)
+        self.use_search_table = await self._search_table_exists()
+        return self
+
+    # Денормалізована таблиця trip_search вмикається з меню обслуговування (schema.py)
+    async def _search_table_exists(self):
+        rows, _ = await self._execute_query("SELECT to_regclass('trip_search') IS NOT NULL", fetch=True)
+        return bool(rows and rows[0][0])
+
+    def _trip_search_query(self):
+        return TRIP_SEARCH_TABLE_QUERY if self.use_search_table else TRIP_SEARCH_QUERY
+
+    async def close_connection(self):
+        if self.pool:
+            await self.pool.close()
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_connection()
+
+    async def _execute_query(self, query, params=None, fetch=False, prepare=None):
+        if not self.pool:
+            return None, "Помилка: Немає з'єднання з БД."
+
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.cursor() as cursor:
+                    with self.metrics.measure(query) as measurement:
+                        await cursor.execute(query, params, prepare=prepare)
+                        result = await cursor.fetchall() if fetch else cursor.rowcount
+                        measurement.rows = len(result) if fetch else result
+            return result, "Запит успішно виконано."
+
+        except errors.ForeignKeyViolation as e:
+            return None, f"Помилка цілісності (ForeignKeyViolation): {e}"
+        except PoolTimeout as e:
+            return None, f"Помилка: Немає з'єднання з БД ({e})."
+        except Exception as e:
+            return None, f"Помилка при виконанні запиту: {e}"
+
+    async def _write(self, table_name, query, params):
+        rowcount, message = await self._execute_query(query, params, prepare=True)
+        if rowcount:
+            self.search_cache.invalidate(table_name)
+        return rowcount, message
+
+    async def get_all_data(self, table_name):
+        return await self.get_page(table_name)
+
+    async def get_page(self, table_name, order_by=None, after=None, before=None, limit=PAGE_SIZE):
+        statement, error = page_query(table_name, order_by, after, before, limit)
+        if error:
+            return None, error
+
+        query, params, descending = statement
+        rows, message = await self._execute_query(query, params, fetch=True)
+        if rows is not None and descending:
+            rows.reverse()
+        return rows, message
+
+    async def _insert(self, table_name, params):
+        query = self.statements.insert(table_name, TABLE_COLUMNS[table_name])
+        return await self._write(table_name, query, params)
+
+    async def add_car(self, vin, license_plate, brand, load_capacity):
+        try:
+            params = (vin, license_plate, brand, int(load_capacity))
+        except ValueError:
+            return "Помилка: 'Вантажопідйомність' має бути числом.", False
+        rowcount, message = await self._insert("car", params)
+        if rowcount is not None:
+            return f"Успішно додано {rowcount} автомобіль.", True
+        return message, False
+
+    async def add_driver(self, license_number, surname, name, license_category):
+        rowcount, message = await self._insert("driver", (license_number, surname, name, license_category))
+        if rowcount is not None:
+            return f"Успішно додано {rowcount} водія.", True
+        return message, False
+
+    async def add_customer(self, full_name, phone, email, address):
+        rowcount, message = await self._insert("customer", (full_name, phone, email, address))
+        if rowcount is not None:
+            return f"Успішно додано {rowcount} клієнта.", True
+        return message, False
+
+    async def add_route(self, departure, destination, distance):
+        try:
+            params = (departure, destination, int(distance))
+        except ValueError:
+            return "Помилка: 'Відстань' має бути числом.", False
+        rowcount, message = await self._insert("route", params)
+        if rowcount is not None:
+            return f"Успішно додано {rowcount} маршрут.", True
+        return message, False
+
+    async def add_service(self, car_id, service_date, description, cost):
+        try:
+            params = (int(car_id), service_date, description, float(cost))
+        except ValueError:
+            return "Помилка: ID має бути числом, а вартість - числом (напр., 3500.00).", False
+        rowcount, message = await self._insert("service", params)
+        if rowcount is not None:
+            return f"Успішно додано {rowcount} запис про обслуговування.", True
+        return message, False
+
+    async def add_trip(self, departure, arrival, return_d, cargo_desc, cargo_weight, car_id, driver_id, route_id,
+                       customer_id):
+        try:
+            params = (departure, arrival, return_d, cargo_desc, int(cargo_weight), int(car_id), int(driver_id),
+                      int(route_id), int(customer_id))
+        except ValueError:
+            return "Помилка: ID та вага мають бути числами."
+        rowcount, message = await self._insert("trip", params)
+        if rowcount is None:
+            return message
+        return f"Успішно додано {rowcount} рейс."
+
+    async def _update_record(self, table_name, id_field, record_id, fields_to_update, values):
+        if not record_id.isdigit():
+            return "Помилка: ID має бути числом."
+
+        updates = [field for field, value in zip(fields_to_update, values) if value]
+        params = [value for value in values if value]
+        if not updates:
+            return "Немає даних для оновлення."
+
+        params.append(int(record_id))
+        query = self.statements.update(table_name, id_field, updates)
+        rowcount, message = await self._write(table_name, query, params)
+
+        if rowcount == 0:
+            return f"Запис з ID {record_id} не знайдено."
+        elif rowcount is not None:
+            return f"Запис (ID: {record_id}) успішно оновлено."
+        else:
+            return message
+
+    async def update_car(self, car_id, brand, load_capacity):
+        try:
+            capacity = int(load_capacity) if load_capacity else load_capacity
+        except ValueError:
+            return "Помилка: Вантажопідйомність має бути числом."
+        return await self._update_record("car", "car_id", car_id, ["brand", "load_capacity"], [brand, capacity])
+
+    async def update_driver(self, driver_id, surname, name, category):
+        return await self._update_record("driver", "driver_id", driver_id, ["surname", "name", "license_category"],
+                                         [surname, name, category])
+
+    async def update_customer(self, customer_id, phone, email):
+        return await self._update_record("customer", "customer_id", customer_id, ["phone", "email"], [phone, email])
+
+    async def update_route(self, route_id, distance):
+        try:
+            distance = int(distance) if distance else distance
+        except ValueError:
+            return "Помилка: Відстань має бути числом."
+        return await self._update_record("route", "route_id", route_id, ["distance_km"], [distance])
+
+    async def update_service(self, service_id, description, cost):
+        try:
+            cost = float(cost) if cost else cost
+        except ValueError:
+            return "Помилка: Вартість має бути числом."
+        return await self._update_record("service", "service_id", service_id, ["description", "cost"],
+                                         [description, cost])
+
+    async def update_trip(self, trip_id, cargo_desc, cargo_weight):
+        try:
+            weight = int(cargo_weight) if cargo_weight else cargo_weight
+        except ValueError:
+            return "Помилка: Вага має бути числом."
+        return await self._update_record("trip", "trip_id", trip_id, ["cargo_description", "cargo_weight"],
+                                         [cargo_desc, weight])
+
+    async def delete_data_dynamic(self, table_name, field, value):
+        if not table_name.replace('_', '').isalnum() or not field.replace('_', '').isalnum():
+            return "Помилка: Неприпустима назва таблиці або поля."
+
+        try:
+            param = int(value)
+        except ValueError:
+            param = str(value)
+
+        query = self.statements.delete(table_name, field)
+        rowcount, message = await self._write(table_name, query, (param,))
+
+        if rowcount is None:
+            if "ForeignKeyViolation" in message:
+                return f"ПОМИЛКА: update або delete в таблиці \"{table_name}\" порушує обмеження зовнішнього ключа."
+            return message
+        elif rowcount == 0:
+            return f"0 rows affected. (Запис з {field} = {value} не знайдено)."
+        else:
+            return f"Deleted successfully! {rowcount} рядків видалено."
+
+    async def _generate_data(self, table_name, query, count):
+        start_time = time.perf_counter()
+        rowcount, message = await self._execute_query(query, (count,))
+        if rowcount is None:
+            return None, message
+        if rowcount:
+            self.search_cache.invalidate(table_name)
+        # INSERT ... SELECT нічого не вставляє, якщо порожня батьківська таблиця (напр. 'car' для 'service')
+        if rowcount < count:
+            return rowcount, (f"Помилка: Згенеровано {rowcount} з {count} записів '{table_name}'. "
+                              f"Перевірте, чи заповнені батьківські таблиці.")
+        duration = time.perf_counter() - start_time
+        rate = rowcount / duration if duration > 0 else 0
+        return rowcount, f"Успішно згенеровано {rowcount} записів за {duration:.2f} с ({rate:.0f} рядків/с)."
+
+    async def _load_columns(self, table_name, column_chunks):
+        if not self.pool:
+            return None, "Помилка: Немає з'єднання з БД."
+
+        start_time = time.perf_counter()
+        column_chunks = iter(column_chunks)
+        loaded = 0
+        try:
+            async with self.pool.connection() as conn, conn.cursor() as cursor:
+                async with cursor.copy(f"COPY {table_name} ({', '.join(TABLE_COLUMNS[table_name])}) FROM STDIN") as copy:
+                    # Генерація порції та побудова тексту COPY — робота CPU; в окремому потоці
+                    # вона не блокує цикл подій, і інші корутини тим часом виконують свої запити
+                    while (block := await asyncio.to_thread(next_copy_block, column_chunks)) is not None:
+                        rows, data = block
+                        await copy.write(data)
+                        loaded += rows
+        except Exception as e:
+            return None, f"Помилка при пакетній вставці у '{table_name}': {e}"
+        finally:
+            if loaded:
+                self.search_cache.invalidate(table_name)
+
+        duration = time.perf_counter() - start_time
+        self.metrics.record(f"COPY {table_name} (columns)", duration * 1000, loaded)
+        rate = loaded / duration if duration > 0 else 0
+        return loaded, (f"Завантажено {loaded} рядків у '{table_name}' (columns) "
+                        f"за {duration:.2f} с ({rate:.0f} рядків/с).")
+
+    async def generate_cars(self, count):
+        rng = np.random.default_rng()
+        chunks = vectorized.column_chunks(count, GENERATION_CHUNK_ROWS,
+                                          lambda n: vectorized.car_columns(n, rng))
+        rowcount, message = await self._load_columns("car", chunks)
+        if rowcount is None:
+            return None, message
+        return rowcount, f"Успішно згенеровано {rowcount} записів 'car'. {message}"
+
+    async def generate_drivers(self, count):
+        return await self._generate_data("driver", DRIVER_GENERATION_QUERY, count)
+
+    async def generate_routes(self, count):
+        return await self._generate_data("route", ROUTE_GENERATION_QUERY, count)
+
+    async def generate_customers(self, count):
+        return await self._generate_data("customer", CUSTOMER_GENERATION_QUERY, count)
+
+    async def generate_trips(self, count):
+        if not self.pool:
+            return None, "Помилка: Немає з'єднання з БД."
+
+        try:
+            car_ids = await self.fk_sampler.ids("car", "car_id")
+            driver_ids = await self.fk_sampler.ids("driver", "driver_id")
+            route_ids = await self.fk_sampler.ids("route", "route_id")
+            customer_ids = await self.fk_sampler.ids("customer", "customer_id")
+        except Exception as e:
+            return None, f"Помилка отримання ID батьківських таблиць: {e}"
+
+        if not all(len(ids) for ids in (car_ids, driver_ids, route_ids, customer_ids)):
+            return None, ("Помилка: Неможливо згенерувати 'trip'. "
+                          "Одна або декілька батьківських таблиць порожні.")
+
+        rng = np.random.default_rng()
+        chunks = vectorized.column_chunks(
+            count, GENERATION_CHUNK_ROWS,
+            lambda n: vectorized.trip_columns(n, rng, car_ids, driver_ids, route_ids, customer_ids))
+        rowcount, message = await self._load_columns("trip", chunks)
+        if rowcount is None:
+            return None, message
+        return rowcount, f"Успішно згенеровано {rowcount} записів 'trip'. {message}"
+
+    async def generate_service(self, count):
+        return await self._generate_data("service", SERVICE_GENERATION_QUERY, count)
+
+    async def search_trips_complex(self, min_weight, max_weight, brand_pattern):
+        if not self.pool:
+            return None, 0, "Помилка: Немає з'єднання з БД."
+
+        try:
+            start_time = time.perf_counter()
+            key = search_key(min_weight, max_weight, brand_pattern)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return list(cached), (time.perf_counter() - start_time) * 1000, "Пошук успішний (з кешу)."
+
+            generation = self.search_cache.generation(SEARCH_TABLES)
+            async with self.pool.connection() as conn, conn.cursor() as cursor:
+                query = self._trip_search_query()
+                with self.metrics.measure(query) as measurement:
+                    start_time = time.perf_counter()
+                    await cursor.execute(query, (min_weight, max_weight, brand_pattern))
+                    result = await cursor.fetchall()
+                    duration_ms = (time.perf_counter() - start_time) * 1000
+                    measurement.rows = len(result)
+            self.search_cache.put(key, tuple(result), SEARCH_TABLES, generation)
+            return result, duration_ms, "Пошук успішний."
+
+        except Exception as e:
+            return None, 0, f"Помилка пошуку: {e}"
+
+    async def _stream_query(self, query, params=None, itersize=STREAM_ITERSIZE):
+        fetch_time = 0.0
+        rowcount = 0
+        failed = False
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                    start_time = time.perf_counter()
+                    await cursor.execute(query, params)
+                    fetch_time += time.perf_counter() - start_time
+                    while True:
+                        start_time = time.perf_counter()
+                        rows = await cursor.fetchmany(itersize)
+                        fetch_time += time.perf_counter() - start_time
+                        if not rows:
+                            break
+                        rowcount += len(rows)
+                        for row in rows:
+                            yield row
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.metrics.record(query, fetch_time * 1000, rowcount, error=failed)
+
+    async def _cache_stream(self, key, generation, rows):
+        collected = []
+        async for row in rows:
+            if collected is not None:
+                collected.append(row)
+                if len(collected) > self.search_cache.max_rows:
+                    collected = None
+            yield row
+        if collected is not None:
+            self.search_cache.put(key, tuple(collected), SEARCH_TABLES, generation)
+
+    # Повертає асинхронний ітератор рядків (async for), час до першого рядка та повідомлення
+    async def stream_trips_complex(self, min_weight, max_weight, brand_pattern):
+        if not self.pool:
+            return None, 0, "Помилка: Немає з'єднання з БД."
+
+        try:
+            start_time = time.perf_counter()
+            key = search_key(min_weight, max_weight, brand_pattern)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return iter_rows(cached), (time.perf_counter() - start_time) * 1000, "Пошук успішний (з кешу)."
+
+            generation = self.search_cache.generation(SEARCH_TABLES)
+            rows = self._cache_stream(key, generation,
+                                      self._stream_query(self._trip_search_query(), (min_weight, max_weight, brand_pattern)))
+            start_time = time.perf_counter()
+            first_row = await anext(rows, None)
+            duration_ms = (time.perf_counter() - start_time) * 1000
+        except Exception as e:
+            return None, 0, f"Помилка пошуку: {e}"
+
+        async def chained():
+            if first_row is None:
+                return
+            yield first_row
+            async for row in rows:
+                yield row
+
+        return chained(), duration_ms, "Пошук успішний."
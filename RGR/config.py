@@ -4,4 +4,40 @@ DB_PARAMS = {
     "password": "1111",
     "host": "localhost",
     "port": "5432"
-}
\ No newline at end of file
+}
+
+# Пул з'єднань (psycopg_pool): розмір, перевірка перед видачею, закриття простоюючих
+# з'єднань та повторне підключення з експоненційною затримкою
+POOL_PARAMS = {
+    "min_size": 1,
+    "max_size": 10,
+    "timeout": 30,
+    "max_idle": 300,
+    "max_lifetime": 3600,
+    "reconnect_timeout": 300,
+}
+
+POOL_OPEN_TIMEOUT = 10
+
+# Скільки різних підготовлених запитів (форм INSERT/UPDATE) зберігає одне з'єднання
+PREPARED_MAX = 100
+
+PAGE_SIZE = 100
+
+# Розмір порції пакетних операцій (add_many/update_many/delete_many), що виконується
+# в одній точці збереження
+BATCH_SIZE = 1000
+
+# Розмір пакета, який серверний курсор передає клієнту за один fetchmany
+STREAM_ITERSIZE = 2000
+
+# Кеш результатів комплексного пошуку: кількість записів (LRU), час життя в секундах
+# та максимальна кількість рядків результату, який ще кешується
+SEARCH_CACHE = {
+    "maxsize": 128,
+    "ttl": 60,
+    "max_rows": 10000,
+}
+
+# Кількість рядків, які векторизований генератор створює та передає в COPY за раз
+GENERATION_CHUNK_ROWS = 100000
@@ -1,11 +1,14 @@
-from model import Model
+import os
 import view
 
 
+# model, parallel і schema тягнуть psycopg та numpy, тому імпортуються
+# у функціях при першому використанні, а не при імпорті контролера
 def run():
+    from model import Model
     model = Model()
 
-    if model.conn is None:
+    if model.pool is None:
         view.show_message("Не вдалося підключитися до БД. Робота програми неможлива.")
         return
 
@@ -24,6 +27,8 @@ def run():
         elif choice == '5':
             run_generate_data_menu(model)
         elif choice == '6':
+            run_maintenance_menu(model)
+        elif choice == '7':
             model.close_connection()
             view.show_message("До побачення!")
             break
@@ -31,40 +36,29 @@ def run():
             view.show_message("Невірний вибір. Спробуйте ще раз.")
 
 
+TABLE_HEADERS = {
+    "car": ["car_id", "vin", "license_plate", "brand", "load_capacity"],
+    "driver": ["driver_id", "license_number", "surname", "name", "license_category"],
+    "route": ["route_id", "departure_point", "destination_point", "distance_km"],
+    "customer": ["customer_id", "full_name", "phone", "email", "address"],
+    "trip": ["trip_id", "departure_date", "arrival_date", "return_date", "cargo_description",
+             "cargo_weight", "car_id", "driver_id", "route_id", "customer_id"],
+    "service": ["service_id", "car_id", "service_date", "description", "cost"],
+}
+
+
 def run_show_data_menu(model):
     options = ["Показати 'Car'", "Показати 'Driver'", "Показати 'Route'",
                "Показати 'Customer'", "Показати 'Trip'", "Показати 'Service'",
                "Комплексний пошук рейсів"]
+    tables = ["car", "driver", "route", "customer", "trip", "service"]
 
     while True:
         view.show_submenu("Меню Перегляду Даних (Show data)", options)
         choice = view.get_user_choice()
 
-        if choice == '1':
-            rows, msg = model.get_all_data("car")
-            if rows: view.show_list(rows, ["car_id", "vin", "license_plate", "brand", "load_capacity"])
-            view.show_message(msg)
-        elif choice == '2':
-            rows, msg = model.get_all_data("driver")
-            if rows: view.show_list(rows, ["driver_id", "license_number", "surname", "name", "license_category"])
-            view.show_message(msg)
-        elif choice == '3':
-            rows, msg = model.get_all_data("route")
-            if rows: view.show_list(rows, ["route_id", "departure_point", "destination_point", "distance_km"])
-            view.show_message(msg)
-        elif choice == '4':
-            rows, msg = model.get_all_data("customer")
-            if rows: view.show_list(rows, ["customer_id", "full_name", "phone", "email", "address"])
-            view.show_message(msg)
-        elif choice == '5':
-            rows, msg = model.get_all_data("trip")
-            if rows: view.show_list(rows,["trip_id", "departure_date", "arrival_date", "return_date", "cargo_description",
-                                     "cargo_weight", "car_id", "driver_id", "route_id", "customer_id"])
-            view.show_message(msg)
-        elif choice == '6':
-            rows, msg = model.get_all_data("service")
-            if rows: view.show_list(rows, ["service_id", "car_id", "service_date", "description", "cost"])
-            view.show_message(msg)
+        if choice in ('1', '2', '3', '4', '5', '6'):
+            browse_table(model, tables[int(choice) - 1])
         elif choice == '7':
             handle_complex_search(model)
         elif choice == '0':
@@ -73,16 +67,59 @@ def run_show_data_menu(model):
             view.show_message("Невірний вибір.")
 
 
+def browse_table(model, table_name):
+    headers = TABLE_HEADERS[table_name]
+    order_by = view.get_order_column(headers)
+    if order_by and order_by not in headers:
+        view.show_message(f"Невідома колонка '{order_by}'.")
+        return
+    order_by = order_by or None
+
+    rows, msg = model.get_page(table_name, order_by=order_by)
+    page = 1
+    while True:
+        if rows is None:
+            view.show_message(msg)
+            return
+        view.show_list(rows, headers)
+        view.show_message(f"{msg} Сторінка {page}.")
+
+        action = view.get_page_action()
+        if action == 'n':
+            if not rows:
+                continue
+            next_rows, msg = model.get_page(table_name, order_by=order_by, after=rows[-1])
+            if next_rows:
+                rows, page = next_rows, page + 1
+            elif next_rows is not None:
+                msg = "Це остання сторінка."
+        elif action == 'p':
+            if page == 1 or not rows:
+                msg = "Це перша сторінка."
+                continue
+            prev_rows, msg = model.get_page(table_name, order_by=order_by, before=rows[0])
+            if prev_rows:
+                rows, page = prev_rows, page - 1
+            elif prev_rows is not None:
+                msg = "Це перша сторінка."
+        elif action == '0':
+            break
+        else:
+            msg = "Невірний вибір."
+
+
 def handle_complex_search(model):
     try:
         min_w, max_w, pattern = view.get_search_params()
         min_w_int, max_w_int = int(min_w), int(max_w)
-        rows, duration, message = model.search_trips_complex(min_w_int, max_w_int, pattern)
+        rows, duration, message = model.stream_trips_complex(min_w_int, max_w_int, pattern)
         if rows is not None:
             view.show_search_results(rows, duration)
         view.show_message(message)
     except ValueError:
         view.show_message("Помилка: Вага має бути числом.")
+    except Exception as e:
+        view.show_message(f"Помилка пошуку: {e}")
 
 
 def run_add_data_menu(model):
@@ -212,30 +249,94 @@ def run_generate_data_menu(model):
         view.show_submenu("Меню Генерації Даних (Generate data)", options)
         choice = view.get_user_choice()
 
+        generators = {'1': "generate_cars", '2': "generate_drivers", '3': "generate_routes",
+                      '4': "generate_customers", '5': "generate_trips", '6': "generate_service"}
+
         try:
             if choice == '0':
                 break
+            if choice not in generators:
+                view.show_message("Невірний вибір.")
+                continue
 
             count_str = view.get_generation_count()
             count = int(count_str)
             if count <= 0: raise ValueError("Кількість > 0")
 
+            workers_str = view.get_worker_count(os.cpu_count())
+            workers = int(workers_str) if workers_str else 1
+            if workers <= 0: raise ValueError("Кількість процесів > 0")
+
+            if workers > 1:
+                import parallel
+                _, message = parallel.generate_parallel(generators[choice], count, workers)
+                view.show_message(message)
+                # Інші процеси пишуть в обхід цієї моделі, тож кеш пошуку вже неактуальний
+                model.search_cache.clear()
+            else:
+                _, message = getattr(model, generators[choice])(count)
+                view.show_message(message)
+
+        except ValueError as e:
+            view.show_message(f"Помилка: Кількість має бути додатнім числом. {e}")
+        except Exception as e:
+            view.show_message(f"Неочікувана помилка: {e}")
+
+
+def run_maintenance_menu(model):
+    import schema
+    from model import TRIP_SEARCH_TABLE_QUERY
+
+    options = ["Створити індекси для пошуку рейсів", "Перевірити індекси",
+               "Порівняти час пошуку з індексами та без", "Статистика запитів",
+               "Експортувати статистику запитів у файл", "Скинути статистику запитів",
+               "Статистика кешу пошуку", "Очистити кеш пошуку",
+               "Увімкнути таблицю пошуку trip_search", "Вимкнути таблицю пошуку trip_search"]
+
+    while True:
+        view.show_submenu("Меню Обслуговування БД (Maintenance)", options)
+        choice = view.get_user_choice()
+
+        try:
             if choice == '1':
-                view.show_message(model.generate_cars(count))
+                view.show_list(schema.ensure_indexes(model.pool), ["Об'єкт", "Статус"])
             elif choice == '2':
-                view.show_message(model.generate_drivers(count))
+                view.show_list(schema.verify_indexes(model.pool), ["Індекс", "Статус"])
             elif choice == '3':
-                view.show_message(model.generate_routes(count))
+                min_w, max_w, pattern = view.get_search_params()
+                with_idx, without_idx, rowcount = schema.measure_search_latency(
+                    model.pool, int(min_w), int(max_w), pattern)
+                view.show_message(f"Знайдено {rowcount} рядків. З індексами: {with_idx:.2f} мс, "
+                                  f"без індексів: {without_idx:.2f} мс (медіана).")
+                if model.use_search_table:
+                    table_idx, _, _ = schema.measure_search_latency(
+                        model.pool, int(min_w), int(max_w), pattern, query=TRIP_SEARCH_TABLE_QUERY)
+                    view.show_message(f"Таблиця trip_search: {table_idx:.2f} мс (медіана).")
             elif choice == '4':
-                view.show_message(model.generate_customers(count))
+                view.show_query_stats(model.metrics.snapshot())
             elif choice == '5':
-                view.show_message(model.generate_trips(count))
+                path = view.get_export_path()
+                count = model.metrics.export(path)
+                view.show_message(f"Статистику {count} запитів збережено у '{path}'.")
             elif choice == '6':
-                view.show_message(model.generate_service(count))
+                model.metrics.reset()
+                view.show_message("Статистику запитів скинуто.")
+            elif choice == '7':
+                view.show_cache_stats(model.search_cache.stats())
+            elif choice == '8':
+                model.search_cache.clear()
+                view.show_message("Кеш пошуку очищено.")
+            elif choice == '9':
+                view.show_list(schema.enable_search_table(model.pool), ["Об'єкт", "Статус"])
+                model.use_search_table = True
+            elif choice == '10':
+                view.show_list(schema.disable_search_table(model.pool), ["Об'єкт", "Статус"])
+                model.use_search_table = False
+            elif choice == '0':
+                break
             else:
                 view.show_message("Невірний вибір.")
-
-        except ValueError as e:
-            view.show_message(f"Помилка: Кількість має бути додатнім числом. {e}")
+        except ValueError:
+            view.show_message("Помилка: Вага має бути числом.")
         except Exception as e:
-            view.show_message(f"Неочікувана помилка: {e}")
\ No newline at end of file
+            view.show_message(f"Помилка: {e}")
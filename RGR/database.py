@@ -0,0 +1,44 @@
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
+from config import DB_PARAMS, POOL_PARAMS, POOL_OPEN_TIMEOUT, PREPARED_MAX
+
+
+def _on_reconnect_failed(pool):
+    print(f"Не вдалося відновити з'єднання з БД (пул '{pool.name}').")
+
+
+# Кожне з'єднання тримає власний LRU-кеш підготовлених на сервері запитів
+def _configure(conn):
+    conn.prepared_max = PREPARED_MAX
+
+
+def create_pool():
+    pool = ConnectionPool(
+        kwargs=DB_PARAMS,
+        check=ConnectionPool.check_connection,
+        configure=_configure,
+        reconnect_failed=_on_reconnect_failed,
+        open=False,
+        **POOL_PARAMS
+    )
+    pool.open()
+    # wait() закриває пул і кидає PoolTimeout, якщо БД недоступна під час старту
+    pool.wait(timeout=POOL_OPEN_TIMEOUT)
+    return pool
+
+
+async def _configure_async(conn):
+    conn.prepared_max = PREPARED_MAX
+
+
+async def create_async_pool():
+    pool = AsyncConnectionPool(
+        kwargs=DB_PARAMS,
+        check=AsyncConnectionPool.check_connection,
+        configure=_configure_async,
+        reconnect_failed=_on_reconnect_failed,
+        open=False,
+        **POOL_PARAMS
+    )
+    await pool.open()
+    await pool.wait(timeout=POOL_OPEN_TIMEOUT)
+    return pool
@@ -0,0 +1,97 @@
+import numpy as np
+
+# Бінарний COPY: заголовок 19 байт, кожен рядок — кількість полів (int16),
+# довжина поля (int32) і саме значення; у кінці маркер -1 (int16).
+_COPY_HEADER_SIZE = 19
+_COPY_TRAILER_SIZE = 2
+
+
+def _parse_binary_ids(data):
+    body = memoryview(data)[_COPY_HEADER_SIZE:len(data) - _COPY_TRAILER_SIZE]
+    if not body:
+        return np.empty(0, dtype=np.int64)
+    value_size = int.from_bytes(body[2:6], "big")
+    row_type = np.dtype([("fields", ">i2"), ("length", ">i4"), ("value", f">i{value_size}")])
+    return np.frombuffer(body, dtype=row_type)["value"].astype(np.int64)
+
+
+# Джерело id батьківських таблиць для генераторів з FK.
+# Щільні serial-ключі (без пропусків) повертаються як range без читання рядків,
+# решта — як відсортований масив int64, який кешується між викликами
+# і дочитується інкрементально (лише id, більші за останній кешований).
+class FKSampler:
+    def __init__(self, pool):
+        self.pool = pool
+        self._cache = {}
+
+    def ids(self, table_name, id_column):
+        key = (table_name, id_column)
+        with self.pool.connection() as conn, conn.cursor() as cursor:
+            cursor.execute(f"SELECT min({id_column}), max({id_column}), count(*) FROM {table_name}")
+            low, high, count = cursor.fetchone()
+
+            if not count:
+                self._cache.pop(key, None)
+                return range(0)
+            if high - low + 1 == count:
+                self._cache.pop(key, None)
+                return range(low, high + 1)
+
+            cached = self._cache.get(key)
+            if cached is not None and len(cached) and cached[0] == low and cached[-1] <= high:
+                fresh = self._load(cursor, table_name, id_column, after=int(cached[-1]))
+                cached = np.concatenate([cached, fresh])
+                # Видалення змінюють кількість — тоді кеш перечитується повністю
+                if len(cached) == count:
+                    self._cache[key] = cached
+                    return cached
+
+            cached = self._load(cursor, table_name, id_column)
+            self._cache[key] = cached
+            return cached
+
+    def _load(self, cursor, table_name, id_column, after=None):
+        where = f"WHERE {id_column} > {int(after)}" if after is not None else ""
+        data = bytearray()
+        with cursor.copy(f"COPY (SELECT {id_column} FROM {table_name} {where} ORDER BY {id_column}) "
+                         f"TO STDOUT (FORMAT BINARY)") as copy:
+            for block in copy:
+                data += block
+        return _parse_binary_ids(data)
+
+
+# Асинхронний варіант для AsyncModel: та сама логіка кешу поверх AsyncConnectionPool
+class AsyncFKSampler(FKSampler):
+    async def ids(self, table_name, id_column):
+        key = (table_name, id_column)
+        async with self.pool.connection() as conn, conn.cursor() as cursor:
+            await cursor.execute(f"SELECT min({id_column}), max({id_column}), count(*) FROM {table_name}")
+            low, high, count = await cursor.fetchone()
+
+            if not count:
+                self._cache.pop(key, None)
+                return range(0)
+            if high - low + 1 == count:
+                self._cache.pop(key, None)
+                return range(low, high + 1)
+
+            cached = self._cache.get(key)
+            if cached is not None and len(cached) and cached[0] == low and cached[-1] <= high:
+                fresh = await self._load(cursor, table_name, id_column, after=int(cached[-1]))
+                cached = np.concatenate([cached, fresh])
+                if len(cached) == count:
+                    self._cache[key] = cached
+                    return cached
+
+            cached = await self._load(cursor, table_name, id_column)
+            self._cache[key] = cached
+            return cached
+
+    async def _load(self, cursor, table_name, id_column, after=None):
+        where = f"WHERE {id_column} > {int(after)}" if after is not None else ""
+        data = bytearray()
+        async with cursor.copy(f"COPY (SELECT {id_column} FROM {table_name} {where} ORDER BY {id_column}) "
+                               f"TO STDOUT (FORMAT BINARY)") as copy:
+            async for block in copy:
+                data += block
+        return _parse_binary_ids(data)
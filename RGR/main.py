@@ -1,4 +1,11 @@
-import controller
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Підкоманди (generate, search, browse, export) виконуються без меню; --help обробляє cli.py
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
+
+    # Контролер, а з ним драйвер БД, імпортується лише для роботи з меню
+    import controller
     controller.run()
\ No newline at end of file
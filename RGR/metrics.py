@@ -0,0 +1,119 @@
+import csv
+import json
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Логарифмічні кошики гістограми: верхня межа i-го кошика = BASE * GROWTH ** i мс.
+# Пам'ять на шаблон запиту стала, а похибка перцентиля не перевищує 10 %.
+_BUCKET_BASE_MS = 0.01
+_BUCKET_GROWTH = 1.1
+_BUCKET_COUNT = 200
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement):
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (_BUCKET_COUNT + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, duration_ms):
+        if duration_ms <= _BUCKET_BASE_MS:
+            index = 0
+        else:
+            index = min(math.ceil(math.log(duration_ms / _BUCKET_BASE_MS, _BUCKET_GROWTH)), _BUCKET_COUNT)
+        self.counts[index] += 1
+        self.total += 1
+        self.sum_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, percent):
+        if not self.total:
+            return 0.0
+        target = math.ceil(self.total * percent / 100)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(_BUCKET_BASE_MS * _BUCKET_GROWTH ** index, self.max_ms)
+        return self.max_ms
+
+
+class StatementStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.rows = 0
+        self.errors = 0
+
+
+class Measurement:
+    def __init__(self):
+        self.rows = 0
+
+
+class QueryMetrics:
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement, duration_ms, rows=0, error=False):
+        key = normalize_statement(statement)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats()
+            stats.latency.add(duration_ms)
+            stats.rows += max(rows, 0)
+            if error:
+                stats.errors += 1
+
+    # perf_counter — монотонний годинник, тож переведення системного часу не спотворює заміри
+    @contextmanager
+    def measure(self, statement):
+        measurement = Measurement()
+        start_time = time.perf_counter()
+        try:
+            yield measurement
+        except Exception:
+            self.record(statement, (time.perf_counter() - start_time) * 1000, measurement.rows, error=True)
+            raise
+        self.record(statement, (time.perf_counter() - start_time) * 1000, measurement.rows)
+
+    def snapshot(self):
+        with self._lock:
+            result = [{
+                "statement": statement,
+                "calls": stats.latency.total,
+                "errors": stats.errors,
+                "rows": stats.rows,
+                "total_ms": round(stats.latency.sum_ms, 3),
+                "p50_ms": round(stats.latency.percentile(50), 3),
+                "p95_ms": round(stats.latency.percentile(95), 3),
+                "p99_ms": round(stats.latency.percentile(99), 3),
+                "max_ms": round(stats.latency.max_ms, 3),
+            } for statement, stats in self._stats.items()]
+        return sorted(result, key=lambda item: item["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def export(self, path):
+        snapshot = self.snapshot()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".json"):
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            else:
+                writer = csv.DictWriter(f, fieldnames=list(snapshot[0]) if snapshot else ["statement"])
+                writer.writeheader()
+                writer.writerows(snapshot)
+        return len(snapshot)
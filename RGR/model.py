@@ -1,115 +1,303 @@
-import datetime
-
+import numpy as np
 import psycopg
 from psycopg import errors
-from config import DB_PARAMS
+from psycopg_pool import PoolTimeout
+from database import create_pool
+from config import PAGE_SIZE, BATCH_SIZE, STREAM_ITERSIZE, GENERATION_CHUNK_ROWS, SEARCH_CACHE
+import vectorized
+from fk_sampler import FKSampler
+from metrics import QueryMetrics
+from statements import StatementRegistry
+from cache import SearchCache
+import itertools
 import time
+from decimal import Decimal
 import uuid
-import random
+
+# Колонки таблиць (без первинних ключів) та їх типи для бінарного COPY
+TABLE_COLUMNS = {
+    "car": {"vin": "varchar", "license_plate": "varchar", "brand": "varchar", "load_capacity": "int4"},
+    "driver": {"license_number": "varchar", "surname": "varchar", "name": "varchar", "license_category": "varchar"},
+    "customer": {"full_name": "varchar", "phone": "varchar", "email": "varchar", "address": "varchar"},
+    "route": {"departure_point": "varchar", "destination_point": "varchar", "distance_km": "int4"},
+    "service": {"car_id": "int4", "service_date": "date", "description": "varchar", "cost": "numeric"},
+    "trip": {"departure_date": "date", "arrival_date": "date", "return_date": "date", "cargo_description": "varchar",
+             "cargo_weight": "int4", "car_id": "int4", "driver_id": "int4", "route_id": "int4", "customer_id": "int4"},
+}
+
+TABLE_KEYS = {
+    "car": "car_id",
+    "driver": "driver_id",
+    "customer": "customer_id",
+    "route": "route_id",
+    "service": "service_id",
+    "trip": "trip_id",
+}
+
+# Колонки, що допускають NULL: keyset-пагінація за ними потребує окремої обробки NULL
+NULLABLE_COLUMNS = {
+    "customer": {"address"},
+    "trip": {"return_date", "cargo_description"},
+}
+
+BULK_LOAD_METHODS = ("text", "binary", "executemany")
+
+
+# Бінарний COPY для numeric приймає лише Decimal; float переводиться через str,
+# щоб у таблицю потрапило те саме значення, що й у текстовому режимі
+def numeric_row(row, positions):
+    row = list(row)
+    for i in positions:
+        if isinstance(row[i], float):
+            row[i] = Decimal(str(row[i]))
+    return row
+
+# Таблиці, від яких залежить результат комплексного пошуку рейсів
+SEARCH_TABLES = ("trip", "car", "driver")
+
+TRIP_SEARCH_QUERY = """
+                    SELECT t.trip_id, \
+                           t.cargo_description, \
+                           t.cargo_weight, \
+                           c.brand, \
+                           c.license_plate, \
+                           d.name || ' ' || d.surname AS driver_full_name
+                    FROM trip AS t \
+                             JOIN \
+                         car AS c ON t.car_id = c.car_id \
+                             JOIN \
+                         driver AS d ON t.driver_id = d.driver_id
+                    WHERE t.cargo_weight BETWEEN %s AND %s
+                      AND c.brand ILIKE %s \
+                    """
+
+# Той самий пошук за денормалізованою таблицею trip_search (див. schema.enable_search_table)
+TRIP_SEARCH_TABLE_QUERY = """
+                          SELECT trip_id, cargo_description, cargo_weight, brand, license_plate, driver_full_name
+                          FROM trip_search
+                          WHERE cargo_weight BETWEEN %s AND %s
+                            AND brand ILIKE %s \
+                          """
+
+DRIVER_GENERATION_QUERY = """
+                           INSERT INTO driver (license_number, surname, name, license_category)
+                           SELECT 'DR' || trunc(100000000000 + random() * 900000000000)::bigint::text, \
+                                  (ARRAY ['Іваненко', 'Петренко', 'Сидоренко', 'Ковальчук', 'Шевченко'])[trunc(random() * 5) + 1], \
+                                  (ARRAY ['Петро', 'Олександр', 'Михайло', 'Іван', 'Сергій'])[trunc(random() * 5) + 1], \
+                                  (ARRAY ['B', 'C', 'CE'])[trunc(random() * 3) + 1]
+                           FROM generate_series(1, %s) \
+                           """
+
+ROUTE_GENERATION_QUERY = """
+                          INSERT INTO route (departure_point, destination_point, distance_km)
+                          SELECT (ARRAY ['Київ', 'Львів', 'Одеса', 'Харків', 'Дніпро'])[trunc(random() * 5) + 1], \
+                                 (ARRAY ['Варшава', 'Берлін', 'Прага', 'Відень', 'Краків'])[trunc(random() * 5) + 1], \
+                                 trunc(300 + random() * 1200)::int
+                          FROM generate_series(1, %s) \
+                          """
+
+CUSTOMER_GENERATION_QUERY = """
+                             INSERT INTO customer (full_name, phone, email, address)
+                             SELECT 'ТОВ ' || chr(trunc(65 + random() * 25)::int) || chr(trunc(65 + random() * 25)::int) || \
+                                    chr(trunc(65 + random() * 25)::int), \
+                                    '+380' || trunc(100000000 + random() * 900000000)::text, \
+                                    LEFT(MD5(random()::text), 10) || '@gmail.com', \
+                                    'м. Київ, вул. ' || (ARRAY ['Хрещатик', 'Сумська', 'Дерибасівська'])[trunc(random() * 3) + 1] || \
+                                    ', ' || trunc(1 + random() * 100)::text
+                             FROM generate_series(1, %s) \
+                             """
+
+# Усі id авто зчитуються одним проходом у масив, а кожен згенерований рядок
+# бере випадковий елемент за індексом — без сортування 'car' на кожен рядок.
+SERVICE_GENERATION_QUERY = """
+                           INSERT INTO service (car_id, service_date, description, cost)
+                           SELECT cars.ids[1 + trunc(random() * cars.n)::int], \
+                                  CURRENT_DATE - (random() * 90)::int, \
+                                  (ARRAY ['Планове ТО', 'Ремонт двигуна', 'Заміна шин', 'Ремонт гальм'])[trunc(random() * 4) + 1], \
+                                  trunc(1000 + random() * 15000)::numeric(10, 2)
+                           FROM (SELECT array_agg(car_id) AS ids, count(*) AS n FROM car) AS cars
+                                    CROSS JOIN generate_series(1, %s)
+                           WHERE cars.n > 0 \
+                           """
+
+
+# Ключ кешу пошуку. ILIKE нечутливий до регістру, тож шаблони 'volvo%' і 'VOLVO%' дають один ключ
+def search_key(min_weight, max_weight, brand_pattern):
+    return int(min_weight), int(max_weight), brand_pattern.lower()
+
+
+# Keyset-пагінація: сторінка починається одразу після (after) або перед (before)
+# переданим рядком, тому вартість запиту не залежить від глибини сторінки.
+# Ключ сортування — (order_by, первинний ключ), щоб порядок був однозначним.
+# NULL-и в колонці сортування йдуть останніми (NULLS LAST, у зворотному напрямку — NULLS FIRST).
+# Повертає ((query, params, descending), None) або (None, повідомлення про помилку).
+def page_query(table_name, order_by=None, after=None, before=None, limit=PAGE_SIZE):
+    if table_name not in TABLE_COLUMNS:
+        return None, "Помилка: Неприпустима назва таблиці."
+
+    key = TABLE_KEYS[table_name]
+    columns = [key] + list(TABLE_COLUMNS[table_name])
+    order_by = order_by or key
+    if order_by not in columns:
+        return None, "Помилка: Неприпустима назва поля."
+
+    sort = [order_by] if order_by == key else [order_by, key]
+    sort_list = ", ".join(sort)
+    params = []
+    where = ""
+    descending = after is None and before is not None
+
+    nullable = order_by in NULLABLE_COLUMNS.get(table_name, ())
+    boundary = after if after is not None else before
+    if boundary is not None:
+        operator = "<" if descending else ">"
+        placeholders = ", ".join(["%s"] * len(sort))
+        where = f"WHERE ({sort_list}) {operator} ({placeholders})"
+        params = [boundary[columns.index(col)] for col in sort]
+        # Порівняння кортежів з NULL дає NULL, тож рядки з NULL обробляються окремою гілкою
+        if nullable and params[0] is None:
+            where = f"WHERE {order_by} IS NULL AND {key} {operator} %s"
+            if descending:
+                where += f" OR {order_by} IS NOT NULL"
+            params = params[1:]
+        elif nullable and not descending:
+            where += f" OR {order_by} IS NULL"
+
+    direction = " DESC" if descending else ""
+    nulls = (" NULLS FIRST" if descending else " NULLS LAST") if nullable else ""
+    order = ", ".join([f"{order_by}{direction}{nulls}"] + [f"{col}{direction}" for col in sort[1:]])
+    query = f"SELECT {', '.join(columns)} FROM {table_name} {where} ORDER BY {order} LIMIT %s"
+    params.append(limit)
+    return (query, params, descending), None
+
 
 class Model:
     def __init__(self):
         try:
-            self.conn = psycopg.connect(**DB_PARAMS)
-            self.conn.autocommit = False
+            self.pool = create_pool()
         except Exception as e:
-            self.conn = None
+            self.pool = None
             print(f"Помилка підключення до БД: {e}")
+        self.fk_sampler = FKSampler(self.pool)
+        self.metrics = QueryMetrics()
+        self.statements = StatementRegistry()
+        self.search_cache = SearchCache(**SEARCH_CACHE)
+        self.use_search_table = self._search_table_exists()
+
+    # Денормалізована таблиця trip_search вмикається з меню обслуговування (schema.py)
+    def _search_table_exists(self):
+        rows, _ = self._execute_query("SELECT to_regclass('trip_search') IS NOT NULL", fetch=True)
+        return bool(rows and rows[0][0])
+
+    def _trip_search_query(self):
+        return TRIP_SEARCH_TABLE_QUERY if self.use_search_table else TRIP_SEARCH_QUERY
 
     def close_connection(self):
-        if self.conn:
-            self.conn.close()
+        if self.pool:
+            self.pool.close()
 
-    def _execute_query(self, query, params=None, fetch=False):
-        if not self.conn:
+    # Кожна операція позичає з'єднання з пулу; при виході з блоку транзакція
+    # фіксується, а у разі винятку відкочується, і з'єднання повертається в пул.
+    def _execute_query(self, query, params=None, fetch=False, prepare=None):
+        if not self.pool:
             return None, "Помилка: Немає з'єднання з БД."
 
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute(query, params)
-
-                if fetch:
-                    result = cursor.fetchall()
-                    self.conn.commit()
-                    return result, "Запит успішно виконано."
-                else:
-                    rowcount = cursor.rowcount
-                    self.conn.commit()
-                    return rowcount, "Запит успішно виконано."
+            with self.pool.connection() as conn:
+                with conn.cursor() as cursor, self.metrics.measure(query) as measurement:
+                    cursor.execute(query, params, prepare=prepare)
+                    result = cursor.fetchall() if fetch else cursor.rowcount
+                    measurement.rows = len(result) if fetch else result
+            return result, "Запит успішно виконано."
 
         except errors.ForeignKeyViolation as e:
-            self.conn.rollback()
             return None, f"Помилка цілісності (ForeignKeyViolation): {e}"
+        except PoolTimeout as e:
+            return None, f"Помилка: Немає з'єднання з БД ({e})."
         except Exception as e:
-            self.conn.rollback()
             return None, f"Помилка при виконанні запиту: {e}"
 
+    # Однорядковий запис через підготовлений шаблон; після успішної зміни
+    # кешовані результати пошуку, що залежать від таблиці, скидаються.
+    def _write(self, table_name, query, params):
+        rowcount, message = self._execute_query(query, params, prepare=True)
+        if rowcount:
+            self.search_cache.invalidate(table_name)
+        return rowcount, message
+
     def get_all_data(self, table_name):
-        if not table_name.replace('_', '').isalnum():
-            return None, "Помилка: Неприпустима назва таблиці."
+        return self.get_page(table_name)
+
+    def get_page(self, table_name, order_by=None, after=None, before=None, limit=PAGE_SIZE):
+        statement, error = page_query(table_name, order_by, after, before, limit)
+        if error:
+            return None, error
 
-        query = f"SELECT * FROM {table_name} LIMIT 100"
-        return self._execute_query(query, fetch=True)
+        query, params, descending = statement
+        rows, message = self._execute_query(query, params, fetch=True)
+        if rows is not None and descending:
+            rows.reverse()
+        return rows, message
 
     def add_car(self, vin, license_plate, brand, load_capacity):
-        query = "INSERT INTO car (vin, license_plate, brand, load_capacity) VALUES (%s, %s, %s, %s)"
+        query = self.statements.insert("car", TABLE_COLUMNS["car"])
         try:
             load_capacity_int = int(load_capacity)
         except ValueError:
             return "Помилка: 'Вантажопідйомність' має бути числом.", False
         params = (vin, license_plate, brand, load_capacity_int)
-        rowcount, message = self._execute_query(query, params)
+        rowcount, message = self._write("car", query, params)
         if rowcount is not None:
             return f"Успішно додано {rowcount} автомобіль.", True
         return message, False
 
     def add_driver(self, license_number, surname, name, license_category):
-        query = "INSERT INTO driver (license_number, surname, name, license_category) VALUES (%s, %s, %s, %s)"
+        query = self.statements.insert("driver", TABLE_COLUMNS["driver"])
         params = (license_number, surname, name, license_category)
-        rowcount, message = self._execute_query(query, params)
+        rowcount, message = self._write("driver", query, params)
         if rowcount is not None:
             return f"Успішно додано {rowcount} водія.", True
         return message, False
 
     def add_customer(self, full_name, phone, email, address):
-        query = "INSERT INTO customer (full_name, phone, email, address) VALUES (%s, %s, %s, %s)"
+        query = self.statements.insert("customer", TABLE_COLUMNS["customer"])
         params = (full_name, phone, email, address)
-        rowcount, message = self._execute_query(query, params)
+        rowcount, message = self._write("customer", query, params)
         if rowcount is not None:
             return f"Успішно додано {rowcount} клієнта.", True
         return message, False
 
     def add_route(self, departure, destination, distance):
-        query = "INSERT INTO route (departure_point, destination_point, distance_km) VALUES (%s, %s, %s)"
+        query = self.statements.insert("route", TABLE_COLUMNS["route"])
         try:
             params = (departure, destination, int(distance))
         except ValueError:
             return "Помилка: 'Відстань' має бути числом.", False
-        rowcount, message = self._execute_query(query, params)
+        rowcount, message = self._write("route", query, params)
         if rowcount is not None:
             return f"Успішно додано {rowcount} маршрут.", True
         return message, False
 
     def add_service(self, car_id, service_date, description, cost):
-        query = "INSERT INTO service (car_id, service_date, description, cost) VALUES (%s, %s, %s, %s)"
+        query = self.statements.insert("service", TABLE_COLUMNS["service"])
         try:
             params = (int(car_id), service_date, description, float(cost))
         except ValueError:
             return "Помилка: ID має бути числом, а вартість - числом (напр., 3500.00).", False
-        rowcount, message = self._execute_query(query, params)
+        rowcount, message = self._write("service", query, params)
         if rowcount is not None:
             return f"Успішно додано {rowcount} запис про обслуговування.", True
         return message, False
 
     def add_trip(self, departure, arrival, return_d, cargo_desc, cargo_weight, car_id, driver_id, route_id,
                  customer_id):
-        query = "INSERT INTO trip (departure_date, arrival_date, return_date, cargo_description, cargo_weight, car_id, driver_id, route_id, customer_id) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+        query = self.statements.insert("trip", TABLE_COLUMNS["trip"])
         try:
             params = (departure, arrival, return_d, cargo_desc, int(cargo_weight), int(car_id), int(driver_id),
                       int(route_id), int(customer_id))
         except ValueError:
             return "Помилка: ID та вага мають бути числами."
-        rowcount, message = self._execute_query(query, params)
+        rowcount, message = self._write("trip", query, params)
         if rowcount is None:
             return message
         return f"Успішно додано {rowcount} рейс."
@@ -123,17 +311,17 @@ class Model:
 
         for i, value in enumerate(values):
             if value:
-                field_name = fields_to_update[i]
-                updates.append(f"{field_name} = %s")
+                updates.append(fields_to_update[i])
                 params.append(value)
 
         if not updates:
             return "Немає даних для оновлення."
 
         params.append(int(record_id))
-        query = f"UPDATE {table_name} SET {', '.join(updates)} WHERE {id_field} = %s"
+        # Шаблон визначається таблицею та набором оновлюваних полів
+        query = self.statements.update(table_name, id_field, updates)
 
-        rowcount, message = self._execute_query(query, params)
+        rowcount, message = self._write(table_name, query, params)
 
         if rowcount == 0:
             return f"Запис з ID {record_id} не знайдено."
@@ -192,14 +380,14 @@ class Model:
         if not table_name.replace('_', '').isalnum() or not field.replace('_', '').isalnum():
             return "Помилка: Неприпустима назва таблиці або поля."
 
-        query = f"DELETE FROM {table_name} WHERE {field} = %s"
+        query = self.statements.delete(table_name, field)
 
         try:
             param = int(value)
         except ValueError:
             param = str(value)
 
-        rowcount, message = self._execute_query(query, (param,))
+        rowcount, message = self._write(table_name, query, (param,))
 
         if rowcount is None:
             if "ForeignKeyViolation" in message:
@@ -211,204 +399,400 @@ class Model:
             return f"Deleted successfully! {rowcount} рядків видалено."
 
 
-    def _generate_data(self, query, count):
-        rowcount, message = self._execute_query(query, (count,))
-        if rowcount is None:
-            return message
-        return f"Успішно згенеровано {rowcount} записів."
+    # Пакетні операції виконуються в одній транзакції через executemany, який psycopg
+    # відправляє в конвеєрному режимі. Кожна порція йде у власній точці збереження:
+    # якщо якийсь рядок порушує обмеження, порція ділиться навпіл, доки помилковий
+    # рядок не буде знайдено, а решта пакета все одно фіксується.
+    def _execute_batch(self, batches, done_message, missing_message):
+        if not self.pool:
+            return None, "Помилка: Немає з'єднання з БД."
 
+        results = {}
+        try:
+            with self.pool.connection() as conn, conn.transaction(), conn.cursor() as cursor:
+                for query, items in batches:
+                    with self.metrics.measure(query) as measurement:
+                        for start in range(0, len(items), BATCH_SIZE):
+                            self._execute_batch_chunk(conn, cursor, query, items[start:start + BATCH_SIZE], results)
+                        measurement.rows = len(items)
+        except PoolTimeout as e:
+            return None, f"Помилка: Немає з'єднання з БД ({e})."
+        except Exception as e:
+            return None, f"Помилка при виконанні пакета: {e}"
+
+        outcome = {}
+        for index, key in results.items():
+            if isinstance(key, psycopg.Error):
+                outcome[index] = (False, f"Помилка: {key.diag.message_primary or key}")
+            elif key is None:
+                outcome[index] = (False, missing_message)
+            else:
+                outcome[index] = (True, done_message.format(key))
+        return outcome, None
+
+    def _execute_batch_chunk(self, conn, cursor, query, chunk, results):
+        try:
+            with conn.transaction():
+                cursor.executemany(query, [params for _, params in chunk], returning=True)
+                keys = []
+                for result in cursor.results():
+                    row = result.fetchone()
+                    keys.append(row[0] if row else None)
+        except psycopg.Error as e:
+            if len(chunk) == 1:
+                results[chunk[0][0]] = e
+                return
+            middle = len(chunk) // 2
+            self._execute_batch_chunk(conn, cursor, query, chunk[:middle], results)
+            self._execute_batch_chunk(conn, cursor, query, chunk[middle:], results)
+            return
+
+        for (index, _), key in zip(chunk, keys):
+            results[index] = key
+
+    def _batch_report(self, table_name, outcome, rejected, done_message, missing_message, batches):
+        executed, error = self._execute_batch(batches, done_message, missing_message)
+        if error:
+            return None, error
+        if any(success for success, _ in executed.values()):
+            self.search_cache.invalidate(table_name)
+
+        executed.update(rejected)
+        results = [(index, success, message) for index, (success, message) in sorted(executed.items())]
+        succeeded = sum(1 for _, success, _ in results if success)
+        return results, f"{outcome}: {succeeded} з {len(results)} записів, з помилками {len(results) - succeeded}."
+
+    def add_many(self, table_name, records):
+        columns, error = self._bulk_columns(table_name, None)
+        if error:
+            return None, error
+
+        items = []
+        rejected = {}
+        for index, record in enumerate(records):
+            if isinstance(record, dict):
+                if any(field not in columns for field in record):
+                    rejected[index] = (False, "Помилка: Неприпустима назва поля.")
+                    continue
+                items.append((index, [record.get(col) for col in columns]))
+            elif len(record) == len(columns):
+                items.append((index, list(record)))
+            else:
+                rejected[index] = (False, f"Помилка: Очікується {len(columns)} значень.")
+
+        query = self.statements.insert(table_name, columns, returning=TABLE_KEYS[table_name])
+        return self._batch_report(table_name, "Додано", rejected, "Додано (ID: {}).", "Запис не додано.",
+                                  [(query, items)])
+
+    def add_cars(self, records):
+        return self.add_many("car", records)
+
+    def add_drivers(self, records):
+        return self.add_many("driver", records)
+
+    def add_customers(self, records):
+        return self.add_many("customer", records)
+
+    def add_routes(self, records):
+        return self.add_many("route", records)
+
+    def add_services(self, records):
+        return self.add_many("service", records)
+
+    def add_trips(self, records):
+        return self.add_many("trip", records)
+
+    # changes — послідовність пар (id, {поле: значення}); записи з однаковим набором
+    # полів групуються під один підготовлений шаблон UPDATE.
+    def update_many(self, table_name, changes):
+        if table_name not in TABLE_COLUMNS:
+            return None, "Помилка: Неприпустима назва таблиці."
 
+        key = TABLE_KEYS[table_name]
+        groups = {}
+        rejected = {}
+        for index, (record_id, fields) in enumerate(changes):
+            if not fields:
+                rejected[index] = (False, "Немає даних для оновлення.")
+            elif any(field not in TABLE_COLUMNS[table_name] for field in fields):
+                rejected[index] = (False, "Помилка: Неприпустима назва поля.")
+            elif not str(record_id).isdigit():
+                rejected[index] = (False, "Помилка: ID має бути числом.")
+            else:
+                field_names = tuple(fields)
+                groups.setdefault(field_names, []).append((index, list(fields.values()) + [int(record_id)]))
+
+        batches = [(self.statements.update(table_name, key, field_names, returning=key), items)
+                   for field_names, items in groups.items()]
+        return self._batch_report(table_name, "Оновлено", rejected, "Запис (ID: {}) оновлено.", "Запис не знайдено.",
+                                  batches)
+
+    def update_cars(self, changes):
+        return self.update_many("car", changes)
+
+    def update_drivers(self, changes):
+        return self.update_many("driver", changes)
+
+    def update_customers(self, changes):
+        return self.update_many("customer", changes)
+
+    def update_routes(self, changes):
+        return self.update_many("route", changes)
+
+    def update_services(self, changes):
+        return self.update_many("service", changes)
+
+    def update_trips(self, changes):
+        return self.update_many("trip", changes)
+
+    def delete_many(self, table_name, ids):
+        if table_name not in TABLE_COLUMNS:
+            return None, "Помилка: Неприпустима назва таблиці."
 
-    def generate_cars(self, count):
+        items = []
+        rejected = {}
+        for index, record_id in enumerate(ids):
+            if str(record_id).isdigit():
+                items.append((index, (int(record_id),)))
+            else:
+                rejected[index] = (False, "Помилка: ID має бути числом.")
+
+        key = TABLE_KEYS[table_name]
+        query = self.statements.delete(table_name, key, returning=key)
+        return self._batch_report(table_name, "Видалено", rejected, "Запис (ID: {}) видалено.", "Запис не знайдено.",
+                                  [(query, items)])
+
+    def _bulk_columns(self, table_name, columns):
+        if table_name not in TABLE_COLUMNS:
+            return None, "Помилка: Неприпустима назва таблиці."
 
-            if not self.conn:
-                return "Помилка: Немає з'єднання з БД."
+        table_columns = TABLE_COLUMNS[table_name]
+        columns = list(columns) if columns else list(table_columns)
+        if any(col not in table_columns for col in columns):
+            return None, "Помилка: Неприпустима назва поля."
+        return columns, None
+
+    def _load_report(self, table_name, method, loaded, start_time):
+        duration = time.perf_counter() - start_time
+        self.search_cache.invalidate(table_name)
+        self.metrics.record(f"COPY {table_name} ({method})", duration * 1000, loaded)
+        rate = loaded / duration if duration > 0 else 0
+        return (f"Завантажено {loaded} рядків у '{table_name}' ({method}) "
+                f"за {duration:.2f} с ({rate:.0f} рядків/с).")
+
+    def bulk_load(self, table_name, rows, columns=None, method="text"):
+        columns, error = self._bulk_columns(table_name, columns)
+        if error:
+            return None, error
+        if method not in BULK_LOAD_METHODS:
+            return None, f"Помилка: Невідомий метод завантаження '{method}'."
+        if not self.pool:
+            return None, "Помилка: Немає з'єднання з БД."
 
-            generated_data = []
-            brands = ['Volvo', 'MAN', 'Scania', 'Mercedes', 'DAF']
+        table_columns = TABLE_COLUMNS[table_name]
+        column_list = ", ".join(columns)
+        start_time = time.perf_counter()
+        try:
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                if method == "executemany":
+                    rows = list(rows)
+                    placeholders = ", ".join(["%s"] * len(columns))
+                    cursor.executemany(f"INSERT INTO {table_name} ({column_list}) VALUES ({placeholders})", rows)
+                    loaded = len(rows)
+                else:
+                    options = " (FORMAT BINARY)" if method == "binary" else ""
+                    loaded = 0
+                    with cursor.copy(f"COPY {table_name} ({column_list}) FROM STDIN{options}") as copy:
+                        if method == "binary":
+                            copy.set_types([table_columns[col] for col in columns])
+                            numeric = [i for i, col in enumerate(columns) if table_columns[col] == "numeric"]
+                            if numeric:
+                                rows = (numeric_row(row, numeric) for row in rows)
+                        for row in rows:
+                            copy.write_row(row)
+                            loaded += 1
+        except Exception as e:
+            return None, f"Помилка при пакетній вставці у '{table_name}': {e}"
 
-            print(f"Генерація {count} записів в Python...")
-            for _ in range(count):
-                raw_uuid = uuid.uuid4()
-                vin = str(raw_uuid).replace('-', '').upper()[:17]
+        return loaded, self._load_report(table_name, method, loaded, start_time)
 
-                plate = (
-                        random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') +
-                        random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') +
-                        f"{random.randint(0, 9999):04d}" +
-                        random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') +
-                        random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-                )
+    # Колонкове завантаження: кожен пакет — список масивів (по одному на колонку),
+    # який одразу перетворюється на блок тексту COPY без циклу по рядках у Python.
+    def bulk_load_columns(self, table_name, column_chunks, columns=None):
+        columns, error = self._bulk_columns(table_name, columns)
+        if error:
+            return None, error
+        if not self.pool:
+            return None, "Помилка: Немає з'єднання з БД."
 
-                brand = random.choice(brands)
-                load_capacity = random.randint(10000, 25000)
+        start_time = time.perf_counter()
+        loaded = 0
+        try:
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                with cursor.copy(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN") as copy:
+                    for chunk in column_chunks:
+                        copy.write(vectorized.to_copy_text(chunk))
+                        loaded += len(chunk[0])
+        except Exception as e:
+            return None, f"Помилка при пакетній вставці у '{table_name}': {e}"
 
-                generated_data.append((vin, plate, brand, load_capacity))
+        return loaded, self._load_report(table_name, "columns", loaded, start_time)
 
-            query = """
-                    INSERT INTO car (vin, license_plate, brand, load_capacity)
-                    VALUES (%s, %s, %s, %s)
-                    """
+    def _generate_data(self, table_name, query, count):
+        start_time = time.perf_counter()
+        rowcount, message = self._execute_query(query, (count,))
+        if rowcount is None:
+            return None, message
+        if rowcount:
+            self.search_cache.invalidate(table_name)
+        # INSERT ... SELECT нічого не вставляє, якщо порожня батьківська таблиця (напр. 'car' для 'service')
+        if rowcount < count:
+            return rowcount, (f"Помилка: Згенеровано {rowcount} з {count} записів '{table_name}'. "
+                              f"Перевірте, чи заповнені батьківські таблиці.")
+        duration = time.perf_counter() - start_time
+        rate = rowcount / duration if duration > 0 else 0
+        return rowcount, f"Успішно згенеровано {rowcount} записів за {duration:.2f} с ({rate:.0f} рядків/с)."
 
-            print(f"Вставка {len(generated_data)} записів у БД...")
-            try:
-                with self.conn.cursor() as cursor:
-                    cursor.executemany(query, generated_data)
-                    inserted_count = cursor.rowcount
-                    self.conn.commit()
-                    if inserted_count < count:
-                        return f"УВАГА: Змогли додати лише {inserted_count} унікальних записів з {count} запитаних (через дублікати VIN)."
-                    else:
-                        return f"Успішно згенеровано та додано {inserted_count} унікальних записів."
-
-            except Exception as e:
-                self.conn.rollback()
-                return f"Помилка при пакетній вставці: {e}"
+    def generate_cars(self, count):
+        rng = np.random.default_rng()
+        chunks = vectorized.column_chunks(count, GENERATION_CHUNK_ROWS,
+                                          lambda n: vectorized.car_columns(n, rng))
+        print(f"Генерація та завантаження {count} записів 'car'...")
+        rowcount, message = self.bulk_load_columns("car", chunks)
+        if rowcount is None:
+            return None, message
+        return rowcount, f"Успішно згенеровано {rowcount} записів 'car'. {message}"
 
     def generate_drivers(self, count):
-        query = """
-                INSERT INTO driver (license_number, surname, name, license_category)
-                SELECT 'DR' || trunc(100000 + random() * 900000)::text, \
-                       (ARRAY ['Іваненко', 'Петренко', 'Сидоренко', 'Ковальчук', 'Шевченко'])[trunc(random() * 5) + 1], \
-                       (ARRAY ['Петро', 'Олександр', 'Михайло', 'Іван', 'Сергій'])[trunc(random() * 5) + 1], \
-                       (ARRAY ['B', 'C', 'CE'])[trunc(random() * 3) + 1]
-                FROM generate_series(1, %s) \
-                """
-        return self._generate_data(query, count)
+        return self._generate_data("driver", DRIVER_GENERATION_QUERY, count)
 
     def generate_routes(self, count):
-        query = """
-                INSERT INTO route (departure_point, destination_point, distance_km)
-                SELECT (ARRAY ['Київ', 'Львів', 'Одеса', 'Харків', 'Дніпро'])[trunc(random() * 5) + 1], \
-                       (ARRAY ['Варшава', 'Берлін', 'Прага', 'Відень', 'Краків'])[trunc(random() * 5) + 1], \
-                       trunc(300 + random() * 1200)::int
-                FROM generate_series(1, %s) \
-                """
-        return self._generate_data(query, count)
+        return self._generate_data("route", ROUTE_GENERATION_QUERY, count)
 
     def generate_customers(self, count):
-        query = """
-                INSERT INTO customer (full_name, phone, email, address)
-                SELECT 'ТОВ ' || chr(trunc(65 + random() * 25)::int) || chr(trunc(65 + random() * 25)::int) || \
-                       chr(trunc(65 + random() * 25)::int), \
-                       '+380' || trunc(100000000 + random() * 900000000)::text, \
-                       LEFT(MD5(random()::text), 10) || '@gmail.com', \
-                       'м. Київ, вул. ' || (ARRAY ['Хрещатик', 'Сумська', 'Дерибасівська'])[trunc(random() * 3) + 1] || \
-                       ', ' || trunc(1 + random() * 100)::text
-                FROM generate_series(1, %s) \
-                """
-        return self._generate_data(query, count)
+        return self._generate_data("customer", CUSTOMER_GENERATION_QUERY, count)
 
 
     def generate_trips(self, count):
+        if not self.pool:
+            return None, "Помилка: Немає з'єднання з БД."
 
-            if not self.conn:
-                return "Помилка: Немає з'єднання з БД."
-
-            print("Отримання списків існуючих ID...")
-            car_ids = self._get_existing_ids("car", "car_id")
-            driver_ids = self._get_existing_ids("driver", "driver_id")
-            route_ids = self._get_existing_ids("route", "route_id")
-            customer_ids = self._get_existing_ids("customer", "customer_id")
-
-            if not all([car_ids, driver_ids, route_ids, customer_ids]):
-                return ("Помилка: Неможливо згенерувати 'trip'. "
-                        "Одна або декілька батьківських таблиць порожні.")
-
-            generated_data = []
-            cargo_options = ['Будматеріали', 'Металопрокат', 'Продукти', 'Техніка', 'Хімікати']
-            print(f"Генерація {count} записів 'trip' в Python...")
-            for _ in range(count):
-                departure_date = datetime.date.today() - datetime.timedelta(days=random.randint(0, 30))
-                arrival_date = departure_date + datetime.timedelta(days=random.randint(1, 10))
-                return_date = arrival_date + datetime.timedelta(days=random.randint(0, 5))
-                cargo_desc = random.choice(cargo_options)
-                cargo_weight = random.randint(50, 249) * 100
-
-                car_id = random.choice(car_ids)
-                driver_id = random.choice(driver_ids)
-                route_id = random.choice(route_ids)
-                customer_id = random.choice(customer_ids)
-
-                generated_data.append((
-                    departure_date, arrival_date, return_date, cargo_desc, cargo_weight,
-                    car_id, driver_id, route_id, customer_id
-                ))
-
-            query = """
-                    INSERT INTO trip (departure_date, arrival_date, return_date, cargo_description, cargo_weight,
-                                      car_id, driver_id, route_id, customer_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """
-
-            print(f"Вставка {len(generated_data)} записів у БД...")
-            try:
-                with self.conn.cursor() as cursor:
-                    cursor.executemany(query, generated_data)
-                    inserted_count = cursor.rowcount
-                    self.conn.commit()
-                    return f"Успішно згенеровано та додано {inserted_count} записів 'trip'."
-
-            except Exception as e:
-                self.conn.rollback()
-                return f"Помилка при пакетній вставці 'trip': {e}"
+        print("Отримання списків існуючих ID...")
+        try:
+            car_ids = self.fk_sampler.ids("car", "car_id")
+            driver_ids = self.fk_sampler.ids("driver", "driver_id")
+            route_ids = self.fk_sampler.ids("route", "route_id")
+            customer_ids = self.fk_sampler.ids("customer", "customer_id")
+        except Exception as e:
+            return None, f"Помилка отримання ID батьківських таблиць: {e}"
+
+        if not all(len(ids) for ids in (car_ids, driver_ids, route_ids, customer_ids)):
+            return None, ("Помилка: Неможливо згенерувати 'trip'. "
+                          "Одна або декілька батьківських таблиць порожні.")
+
+        print(f"Генерація та завантаження {count} записів 'trip'...")
+        rng = np.random.default_rng()
+        chunks = vectorized.column_chunks(
+            count, GENERATION_CHUNK_ROWS,
+            lambda n: vectorized.trip_columns(n, rng, car_ids, driver_ids, route_ids, customer_ids))
+        rowcount, message = self.bulk_load_columns("trip", chunks)
+        if rowcount is None:
+            return None, message
+        return rowcount, f"Успішно згенеровано {rowcount} записів 'trip'. {message}"
 
     def generate_service(self, count):
-        query = """
-                INSERT INTO service (car_id, service_date, description, cost)
-                SELECT (SELECT car_id FROM car ORDER BY random() LIMIT 1), \
-                       CURRENT_DATE - (random() * 90)::int, \
-                       (ARRAY ['Планове ТО', 'Ремонт двигуна', 'Заміна шин', 'Ремонт гальм'])[trunc(random() * 4) + 1], \
-                       trunc(1000 + random() * 15000)::numeric(10, 2)
-                FROM generate_series(1, %s) \
-                """
-        return self._generate_data(query, count)
+        return self._generate_data("service", SERVICE_GENERATION_QUERY, count)
 
 
     def search_trips_complex(self, min_weight, max_weight, brand_pattern):
-
-        query = """
-                SELECT t.trip_id, \
-                       t.cargo_description, \
-                       t.cargo_weight, \
-                       c.brand, \
-                       c.license_plate, \
-                       d.name || ' ' || d.surname AS driver_full_name
-                FROM trip AS t \
-                         JOIN \
-                     car AS c ON t.car_id = c.car_id \
-                         JOIN \
-                     driver AS d ON t.driver_id = d.driver_id
-                WHERE t.cargo_weight BETWEEN %s AND %s
-                  AND c.brand ILIKE %s; \
-                """
-
-        if not self.conn:
+        if not self.pool:
             return None, 0, "Помилка: Немає з'єднання з БД."
 
+        start_time = time.perf_counter()
         try:
-            with self.conn.cursor() as cursor:
-                start_time = time.time()
-                cursor.execute(query, (min_weight, max_weight, brand_pattern))
-                end_time = time.time()
-                duration_ms = (end_time - start_time) * 1000
-
-                result = cursor.fetchall()
-                self.conn.commit()
-                return result, duration_ms, "Пошук успішний."
+            key = search_key(min_weight, max_weight, brand_pattern)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return list(cached), (time.perf_counter() - start_time) * 1000, "Пошук успішний (з кешу)."
+
+            generation = self.search_cache.generation(SEARCH_TABLES)
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                query = self._trip_search_query()
+                with self.metrics.measure(query) as measurement:
+                    start_time = time.perf_counter()
+                    cursor.execute(query, (min_weight, max_weight, brand_pattern))
+                    result = cursor.fetchall()
+                    duration_ms = (time.perf_counter() - start_time) * 1000
+                    measurement.rows = len(result)
+            self.search_cache.put(key, tuple(result), SEARCH_TABLES, generation)
+            return result, duration_ms, "Пошук успішний."
 
         except Exception as e:
-            self.conn.rollback()
             return None, 0, f"Помилка пошуку: {e}"
 
-    def _get_existing_ids(self, table_name, id_column):
-        ids = []
-        if not self.conn:
-            return ids
+    # Іменований (серверний) курсор: рядки надходять пакетами по itersize,
+    # тож пам'ять не залежить від розміру результату. З'єднання повертається
+    # в пул, коли ітератор вичерпано або закрито.
+    # У метрики потрапляє лише час виконання й вибірки, без часу обробки рядків споживачем.
+    def _stream_query(self, query, params=None, itersize=STREAM_ITERSIZE):
+        fetch_time = 0.0
+        rowcount = 0
+        failed = False
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                    cursor.itersize = itersize
+                    start_time = time.perf_counter()
+                    cursor.execute(query, params)
+                    fetch_time += time.perf_counter() - start_time
+                    while True:
+                        start_time = time.perf_counter()
+                        rows = cursor.fetchmany(itersize)
+                        fetch_time += time.perf_counter() - start_time
+                        if not rows:
+                            break
+                        rowcount += len(rows)
+                        yield from rows
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.metrics.record(query, fetch_time * 1000, rowcount, error=failed)
+
+    # Рядки потоку накопичуються, доки їх не більше max_rows; повністю прочитаний
+    # результат кладеться в кеш, якщо за цей час не було запису в залежні таблиці.
+    def _cache_stream(self, key, generation, rows):
+        collected = []
+        for row in rows:
+            if collected is not None:
+                collected.append(row)
+                if len(collected) > self.search_cache.max_rows:
+                    collected = None
+            yield row
+        if collected is not None:
+            self.search_cache.put(key, tuple(collected), SEARCH_TABLES, generation)
+
+    def stream_trips_complex(self, min_weight, max_weight, brand_pattern):
+        if not self.pool:
+            return None, 0, "Помилка: Немає з'єднання з БД."
+
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute(f"SELECT {id_column} FROM {table_name}")
-                ids = [row[0] for row in cursor.fetchall()]
+            start_time = time.perf_counter()
+            key = search_key(min_weight, max_weight, brand_pattern)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return iter(cached), (time.perf_counter() - start_time) * 1000, "Пошук успішний (з кешу)."
+
+            generation = self.search_cache.generation(SEARCH_TABLES)
+            rows = self._cache_stream(key, generation,
+                                      self._stream_query(self._trip_search_query(),
+                                                         (min_weight, max_weight, brand_pattern)))
+            start_time = time.perf_counter()
+            first_row = next(rows, None)
+            duration_ms = (time.perf_counter() - start_time) * 1000
         except Exception as e:
-            print(f"Помилка отримання ID для {table_name}: {e}")
-        return ids
\ No newline at end of file
+            return None, 0, f"Помилка пошуку: {e}"
+
+        if first_row is None:
+            return iter(()), duration_ms, "Пошук успішний."
+        return itertools.chain([first_row], rows), duration_ms, "Пошук успішний."
@@ -0,0 +1,245 @@
+import statistics
+import time
+
+from model import TRIP_SEARCH_QUERY
+
+EXTENSIONS = ["pg_trgm"]
+
+# Індекси під комплексний пошук рейсів та перевірки FK при видаленні батьківських рядків
+INDEXES = {
+    "trip_car_id_idx": "ON trip (car_id)",
+    "trip_driver_id_idx": "ON trip (driver_id)",
+    "trip_route_id_idx": "ON trip (route_id)",
+    "trip_customer_id_idx": "ON trip (customer_id)",
+    "service_car_id_idx": "ON service (car_id)",
+    # Покривний індекс: діапазон за вагою + ключ і колонки для з'єднань і виводу (index-only scan)
+    "trip_cargo_weight_cover_idx": "ON trip (cargo_weight) INCLUDE (trip_id, car_id, driver_id, cargo_description)",
+    # Триграми для ILIKE за шаблоном марки (зокрема з '%' на початку)
+    "car_brand_trgm_idx": "ON car USING gin (brand gin_trgm_ops)",
+}
+
+# Замінені індекси: видаляються після створення нових (trip_cargo_weight_idx не мав trip_id в INCLUDE)
+RETIRED_INDEXES = ["trip_cargo_weight_idx"]
+
+# Денормалізована таблиця для комплексного пошуку: рядок рейсу разом з маркою, номером
+# авто та ПІБ водія. Пошук за нею — діапазонне сканування індексу однієї таблиці без з'єднань.
+SEARCH_TABLE = "trip_search"
+
+_SEARCH_TABLE_DDL = """
+                    CREATE TABLE IF NOT EXISTS trip_search
+                    (
+                        trip_id           integer PRIMARY KEY,
+                        cargo_description varchar(200),
+                        cargo_weight      integer      NOT NULL,
+                        car_id            integer      NOT NULL,
+                        driver_id         integer      NOT NULL,
+                        brand             varchar(50)  NOT NULL,
+                        license_plate     varchar(20)  NOT NULL,
+                        driver_full_name  varchar(101) NOT NULL
+                    ) \
+                    """
+
+# Проєкція рейсів з таблиці-джерела (trip або перехідна таблиця тригера)
+_SEARCH_ROWS = """
+               INSERT INTO trip_search (trip_id, cargo_description, cargo_weight, car_id, driver_id, brand,
+                                        license_plate, driver_full_name)
+               SELECT t.trip_id, t.cargo_description, t.cargo_weight, t.car_id, t.driver_id, c.brand, c.license_plate,
+                      d.name || ' ' || d.surname
+               FROM {source} AS t
+                        JOIN car AS c ON c.car_id = t.car_id
+                        JOIN driver AS d ON d.driver_id = t.driver_id \
+               """
+
+# Тригери рівня інструкції з перехідними таблицями: одна інструкція (зокрема COPY
+# на мільйон рядків) оновлює trip_search одним set-based запитом, а не рядок за рядком.
+# Перехідні таблиці дозволені лише для тригера на одну подію, тому тригерів кілька.
+_SEARCH_TRIGGER_FUNCTIONS = {
+    "trip_search_on_insert": _SEARCH_ROWS.format(source="new_rows"),
+    "trip_search_on_update": """
+        DELETE FROM trip_search AS s USING old_rows AS o WHERE s.trip_id = o.trip_id;
+        """ + _SEARCH_ROWS.format(source="new_rows"),
+    "trip_search_on_delete": """
+        DELETE FROM trip_search AS s USING old_rows AS o WHERE s.trip_id = o.trip_id
+        """,
+    "trip_search_on_truncate": """
+        TRUNCATE trip_search
+        """,
+    "trip_search_on_car_update": """
+        UPDATE trip_search AS s
+        SET brand = n.brand, license_plate = n.license_plate
+        FROM new_rows AS n
+        WHERE s.car_id = n.car_id
+          AND (s.brand, s.license_plate) IS DISTINCT FROM (n.brand, n.license_plate)
+        """,
+    "trip_search_on_driver_update": """
+        UPDATE trip_search AS s
+        SET driver_full_name = n.name || ' ' || n.surname
+        FROM new_rows AS n
+        WHERE s.driver_id = n.driver_id
+          AND s.driver_full_name IS DISTINCT FROM n.name || ' ' || n.surname
+        """,
+}
+
+_SEARCH_TRIGGERS = {
+    "trip_search_ins": "AFTER INSERT ON trip REFERENCING NEW TABLE AS new_rows "
+                       "FOR EACH STATEMENT EXECUTE FUNCTION trip_search_on_insert()",
+    "trip_search_upd": "AFTER UPDATE ON trip REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+                       "FOR EACH STATEMENT EXECUTE FUNCTION trip_search_on_update()",
+    "trip_search_del": "AFTER DELETE ON trip REFERENCING OLD TABLE AS old_rows "
+                       "FOR EACH STATEMENT EXECUTE FUNCTION trip_search_on_delete()",
+    "trip_search_trunc": "AFTER TRUNCATE ON trip "
+                         "FOR EACH STATEMENT EXECUTE FUNCTION trip_search_on_truncate()",
+    "trip_search_car_upd": "AFTER UPDATE ON car REFERENCING NEW TABLE AS new_rows "
+                           "FOR EACH STATEMENT EXECUTE FUNCTION trip_search_on_car_update()",
+    "trip_search_driver_upd": "AFTER UPDATE ON driver REFERENCING NEW TABLE AS new_rows "
+                              "FOR EACH STATEMENT EXECUTE FUNCTION trip_search_on_driver_update()",
+}
+
+_SEARCH_TRIGGER_TABLES = {
+    "trip_search_ins": "trip",
+    "trip_search_upd": "trip",
+    "trip_search_del": "trip",
+    "trip_search_trunc": "trip",
+    "trip_search_car_upd": "car",
+    "trip_search_driver_upd": "driver",
+}
+
+SEARCH_TABLE_INDEXES = {
+    # Покривний індекс: діапазон за вагою віддає всі колонки результату (index-only scan)
+    "trip_search_weight_idx": "ON trip_search (cargo_weight) "
+                              "INCLUDE (trip_id, cargo_description, brand, license_plate, driver_full_name)",
+    "trip_search_car_id_idx": "ON trip_search (car_id)",
+    "trip_search_driver_id_idx": "ON trip_search (driver_id)",
+    "trip_search_brand_trgm_idx": "ON trip_search USING gin (brand gin_trgm_ops)",
+}
+
+# Вимикає індексні плани в межах транзакції, щоб виміряти пошук «без індексів»
+# без видалення індексів і блокування таблиць
+_DISABLE_INDEX_SCANS = [
+    "SET LOCAL enable_indexscan = off",
+    "SET LOCAL enable_indexonlyscan = off",
+    "SET LOCAL enable_bitmapscan = off",
+]
+
+
+# CREATE INDEX CONCURRENTLY не блокує запис, але не може виконуватися в транзакції,
+# тому з'єднання тимчасово переводиться в autocommit.
+def ensure_indexes(pool):
+    results = []
+    with pool.connection() as conn:
+        conn.autocommit = True
+        try:
+            for extension in EXTENSIONS:
+                try:
+                    conn.execute(f"CREATE EXTENSION IF NOT EXISTS {extension}")
+                    results.append((extension, "OK"))
+                except Exception as e:
+                    results.append((extension, f"Помилка: {e}"))
+
+            for name, definition in INDEXES.items():
+                try:
+                    conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+                    results.append((name, "OK"))
+                except Exception as e:
+                    results.append((name, f"Помилка: {e}"))
+
+            for name in RETIRED_INDEXES:
+                try:
+                    conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                except Exception as e:
+                    results.append((name, f"Помилка: {e}"))
+
+            # Свіжа статистика, щоб планувальник одразу врахував нові індекси
+            conn.execute("ANALYZE trip, car, driver, service")
+        finally:
+            conn.autocommit = False
+    return results
+
+
+def verify_indexes(pool):
+    query = """
+            SELECT c.relname, i.indisvalid
+            FROM pg_index AS i
+                     JOIN pg_class AS c ON c.oid = i.indexrelid
+            WHERE c.relname = ANY (%s) \
+            """
+    with pool.connection() as conn:
+        found = dict(conn.execute(query, (list(INDEXES),)).fetchall())
+
+    results = []
+    for name in INDEXES:
+        if name not in found:
+            results.append((name, "відсутній"))
+        elif not found[name]:
+            results.append((name, "невалідний (перебудуйте)"))
+        else:
+            results.append((name, "OK"))
+    return results
+
+
+def _timed_search(conn, query, params, use_indexes, repeat):
+    durations = []
+    rowcount = 0
+    for _ in range(repeat):
+        with conn.transaction():
+            if not use_indexes:
+                for statement in _DISABLE_INDEX_SCANS:
+                    conn.execute(statement)
+            start_time = time.perf_counter()
+            rowcount = len(conn.execute(query, params).fetchall())
+            durations.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(durations), rowcount
+
+
+def measure_search_latency(pool, min_weight, max_weight, brand_pattern, repeat=5, query=TRIP_SEARCH_QUERY):
+    params = (min_weight, max_weight, brand_pattern)
+    with pool.connection() as conn:
+        with_indexes, rowcount = _timed_search(conn, query, params, True, repeat)
+        without_indexes, _ = _timed_search(conn, query, params, False, repeat)
+    return with_indexes, without_indexes, rowcount
+
+
+def search_table_enabled(pool):
+    with pool.connection() as conn:
+        return conn.execute("SELECT to_regclass(%s) IS NOT NULL", (SEARCH_TABLE,)).fetchone()[0]
+
+
+# Створення, тригери та початкове заповнення виконуються в одній транзакції.
+# Блокування SHARE на trip, car і driver не дає паралельним записам проскочити
+# між заповненням і появою тригерів; читання при цьому не блокуються.
+def enable_search_table(pool):
+    results = []
+    with pool.connection() as conn:
+        with conn.transaction():
+            conn.execute("LOCK TABLE trip, car, driver IN SHARE MODE")
+            conn.execute(_SEARCH_TABLE_DDL)
+            for name, body in _SEARCH_TRIGGER_FUNCTIONS.items():
+                conn.execute(f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$\n"
+                             f"BEGIN\n{body.strip().rstrip(';')};\nRETURN NULL;\nEND\n$$")
+            for name, definition in _SEARCH_TRIGGERS.items():
+                conn.execute(f"DROP TRIGGER IF EXISTS {name} ON {_SEARCH_TRIGGER_TABLES[name]}")
+                conn.execute(f"CREATE TRIGGER {name} {definition}")
+            conn.execute("TRUNCATE trip_search")
+            loaded = conn.execute(_SEARCH_ROWS.format(source="trip")).rowcount
+            results.append((SEARCH_TABLE, f"OK ({loaded} рядків)"))
+
+        for name, definition in SEARCH_TABLE_INDEXES.items():
+            try:
+                with conn.transaction():
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+                results.append((name, "OK"))
+            except Exception as e:
+                results.append((name, f"Помилка: {e}"))
+        conn.execute("ANALYZE trip_search")
+    return results
+
+
+def disable_search_table(pool):
+    with pool.connection() as conn:
+        with conn.transaction():
+            for name, table in _SEARCH_TRIGGER_TABLES.items():
+                conn.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+            for name in _SEARCH_TRIGGER_FUNCTIONS:
+                conn.execute(f"DROP FUNCTION IF EXISTS {name}()")
+            conn.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    return [(SEARCH_TABLE, "видалено")]
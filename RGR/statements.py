@@ -0,0 +1,39 @@
+# Реєстр шаблонів запитів для однорядкових записів. Кожна "форма" запиту
+# (таблиця + набір полів) будується один раз і далі повертається той самий рядок,
+# тож psycopg при prepare=True готує його на сервері один раз для кожного
+# з'єднання пулу, а наступні виклики пропускають розбір і планування.
+def _returning(column):
+    return f" RETURNING {column}" if column else ""
+
+
+class StatementRegistry:
+    def __init__(self):
+        self._statements = {}
+
+    def _get(self, key, build):
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = self._statements[key] = build()
+        return statement
+
+    def insert(self, table_name, columns, returning=None):
+        columns = tuple(columns)
+        return self._get(("insert", table_name, columns, returning), lambda: (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})" + _returning(returning)
+        ))
+
+    def update(self, table_name, id_field, fields, returning=None):
+        fields = tuple(fields)
+        return self._get(("update", table_name, id_field, fields, returning), lambda: (
+            f"UPDATE {table_name} SET {', '.join(f'{field} = %s' for field in fields)} "
+            f"WHERE {id_field} = %s" + _returning(returning)
+        ))
+
+    def delete(self, table_name, field, returning=None):
+        return self._get(("delete", table_name, field, returning), lambda: (
+            f"DELETE FROM {table_name} WHERE {field} = %s" + _returning(returning)
+        ))
+
+    def __len__(self):
+        return len(self._statements)
@@ -0,0 +1,62 @@
+import datetime
+
+import numpy as np
+
+BRANDS = np.array(['Volvo', 'MAN', 'Scania', 'Mercedes', 'DAF'])
+CARGO_OPTIONS = np.array(['Будматеріали', 'Металопрокат', 'Продукти', 'Техніка', 'Хімікати'])
+
+LETTERS = np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", dtype=np.uint8)
+DIGITS = np.frombuffer(b"0123456789", dtype=np.uint8)
+HEX_DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+
+# Матриця байтів (n, k) -> масив з n ASCII-рядків довжини k без циклу по рядках
+def _fixed_strings(codes):
+    return np.ascontiguousarray(codes).view(f"S{codes.shape[1]}").ravel()
+
+
+# values — масив id або range (щільний діапазон ключів без пропусків)
+def _pick(values, count, rng):
+    if isinstance(values, range):
+        return rng.integers(values.start, values.stop, count)
+    values = np.asarray(values)
+    return values[rng.integers(0, len(values), count)]
+
+
+def car_columns(count, rng):
+    vin = _fixed_strings(HEX_DIGITS[rng.integers(0, len(HEX_DIGITS), size=(count, 17))])
+
+    plate_codes = np.empty((count, 8), dtype=np.uint8)
+    plate_codes[:, [0, 1, 6, 7]] = LETTERS[rng.integers(0, len(LETTERS), size=(count, 4))]
+    plate_codes[:, 2:6] = DIGITS[rng.integers(0, len(DIGITS), size=(count, 4))]
+    plate = _fixed_strings(plate_codes)
+
+    brand = _pick(BRANDS, count, rng)
+    load_capacity = rng.integers(10000, 25001, count)
+    return [vin, plate, brand, load_capacity]
+
+
+def trip_columns(count, rng, car_ids, driver_ids, route_ids, customer_ids):
+    today = np.datetime64(datetime.date.today(), "D")
+    departure = today - rng.integers(0, 31, count).astype("timedelta64[D]")
+    arrival = departure + rng.integers(1, 11, count).astype("timedelta64[D]")
+    return_date = arrival + rng.integers(0, 6, count).astype("timedelta64[D]")
+
+    cargo = _pick(CARGO_OPTIONS, count, rng)
+    weight = rng.integers(50, 250, count) * 100
+    return [departure, arrival, return_date, cargo, weight,
+            _pick(car_ids, count, rng), _pick(driver_ids, count, rng),
+            _pick(route_ids, count, rng), _pick(customer_ids, count, rng)]
+
+
+def column_chunks(count, chunk_rows, make_columns):
+    for start in range(0, count, chunk_rows):
+        yield make_columns(min(chunk_rows, count - start))
+
+
+# Текстовий формат COPY: колонки через табуляцію, рядки через перенос.
+# Згенеровані значення не містять табуляцій, переносів чи зворотних слешів,
+# тому екранування не потрібне; склеювання виконують join/zip на рівні C.
+def to_copy_text(columns):
+    text_columns = [column.astype(str).tolist() for column in columns]
+    return ("\n".join(map("\t".join, zip(*text_columns))) + "\n").encode()
@@ -1,4 +1,10 @@
 
+import itertools
+
+# Ширина колонок рахується за першими рядками, решта виводиться потоково
+WIDTH_SAMPLE_SIZE = 200
+
+
 def show_main_menu():
     print("\n--- ГОЛОВНЕ МЕНЮ ---")
     print("1.  Показати дані (Show data)")
@@ -6,7 +12,8 @@ def show_main_menu():
     print("3.  Редагувати дані (Update data)")
     print("4.  Видалити дані (Delete data)")
     print("5.  Згенерувати дані (Generate data)")
-    print("6.  Вихід (Quit)")
+    print("6.  Обслуговування БД (Maintenance)")
+    print("7.  Вихід (Quit)")
 
 
 def show_submenu(title, options):
@@ -25,12 +32,14 @@ def show_message(message):
 
 
 def show_list(rows, headers):
-    if not rows:
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, WIDTH_SAMPLE_SIZE))
+    if not sample:
         print("-> Немає даних для відображення.")
-        return
+        return 0
 
     col_widths = [len(str(h)) for h in headers]
-    for row in rows:
+    for row in sample:
         for i, col in enumerate(row):
             col_widths[i] = max(col_widths[i], len(str(col)))
 
@@ -38,9 +47,40 @@ def show_list(rows, headers):
     print("\n" + header_line)
     print("-" * len(header_line))
 
-    for row in rows:
+    count = 0
+    for row in itertools.chain(sample, rows):
         row_line = " | ".join(f"{str(col):<{col_widths[i]}}" for i, col in enumerate(row))
         print(row_line)
+        count += 1
+    return count
+
+
+def get_order_column(headers):
+    print(f"Доступні колонки: {', '.join(headers)}")
+    return input("Сортувати за колонкою (enter - за первинним ключем): ").strip()
+
+
+def get_page_action():
+    return input("n - наступна сторінка, p - попередня, 0 - назад: ").strip().lower()
+
+
+def show_query_stats(stats):
+    headers = ["Запит", "Викликів", "Помилок", "Рядків", "p50, мс", "p95, мс", "p99, мс", "Макс, мс"]
+    rows = [(s["statement"][:60], s["calls"], s["errors"], s["rows"], f"{s['p50_ms']:.2f}",
+             f"{s['p95_ms']:.2f}", f"{s['p99_ms']:.2f}", f"{s['max_ms']:.2f}") for s in stats]
+    show_list(rows, headers)
+
+
+def show_cache_stats(stats):
+    print("\n--- Кеш комплексного пошуку ---")
+    print(f"Записів: {stats['entries']} з {stats['maxsize']} (TTL {stats['ttl']} с)")
+    print(f"Влучань: {stats['hits']}, промахів: {stats['misses']} ({stats['hit_ratio']:.0%} влучань)")
+    print(f"Витіснено (LRU): {stats['evictions']}, інвалідовано записом: {stats['invalidations']}")
+
+
+def get_export_path():
+    path = input("Файл для експорту (.csv або .json, enter - query_stats.csv): ").strip()
+    return path or "query_stats.csv"
 
 
 def get_id_input(prompt="ID"):
@@ -51,6 +91,10 @@ def get_generation_count():
     return input("Введіть кількість записів для генерації: ").strip()
 
 
+def get_worker_count(cpu_count):
+    return input(f"Кількість паралельних процесів (enter - 1, ядер: {cpu_count}): ").strip()
+
+
 def get_search_params():
     print("\n--- Комплексний пошук рейсів ---")
     min_weight = input("Введіть МІН вагу вантажу (напр., 5000): ").strip()
@@ -66,8 +110,8 @@ def get_search_params():
 
 def show_search_results(rows, duration_ms):
     headers = ["Trip ID", "Вантаж", "Вага", "Марка", "Номер", "Водій"]
-    show_list(rows, headers)
-    show_message(f"Час виконання запиту: {duration_ms:.2f} мс.")
+    count = show_list(rows, headers)
+    show_message(f"Знайдено {count} рядків. Час до перших рядків: {duration_ms:.2f} мс.")
 
 
 def get_new_car_data():
@@ -0,0 +1,64 @@
+import argparse
+import sys
+import time
+
+from run_benchmarks import BACKENDS
+
+# Попередня версія: підзапит із сортуванням усієї 'car' для кожного рядка
+LEGACY_SERVICE_GENERATION_QUERY = """
+                                  INSERT INTO service (car_id, service_date, description, cost)
+                                  SELECT (SELECT car_id FROM car ORDER BY random() LIMIT 1), \
+                                         CURRENT_DATE - (random() * 90)::int, \
+                                         (ARRAY ['Планове ТО', 'Ремонт двигуна', 'Заміна шин', 'Ремонт гальм'])[trunc(random() * 4) + 1], \
+                                         trunc(1000 + random() * 15000)::numeric(10, 2)
+                                  FROM generate_series(1, %s) \
+                                  """
+
+
+# Кожен прогін виконується в транзакції, яка відкочується, тож дані в БД не змінюються.
+# Окрім часу рахується кількість різних car_id серед вставлених рядків.
+def run_query(model, query, count):
+    measured = f"WITH inserted AS ({query.strip()} RETURNING car_id) SELECT count(DISTINCT car_id) FROM inserted"
+    with model.pool.connection() as conn:
+        with conn.transaction(force_rollback=True), conn.cursor() as cursor:
+            start_time = time.perf_counter()
+            cursor.execute(measured, (count,))
+            distinct_cars = cursor.fetchone()[0]
+            duration = time.perf_counter() - start_time
+            return distinct_cars, duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Порівняння старої та нової генерації 'service'.")
+    parser.add_argument("counts", nargs="*", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--skip-legacy-above", type=int, default=10000,
+                        help="не запускати стару версію для більших кількостей")
+    parser.add_argument("--dbname", help="БД з наповненою таблицею car (за замовчуванням — з config.py RGR)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKENDS["RGR"])
+    import config
+    if args.dbname:
+        config.DB_PARAMS["dbname"] = args.dbname
+    from model import Model, SERVICE_GENERATION_QUERY
+
+    model = Model()
+    if model.pool is None:
+        return
+
+    try:
+        for count in args.counts:
+            new_cars, new_duration = run_query(model, SERVICE_GENERATION_QUERY, count)
+            line = f"{count:>10} рядків | нова: {new_duration * 1000:10.1f} мс, різних авто: {new_cars}"
+            if count <= args.skip_legacy_above:
+                old_cars, old_duration = run_query(model, LEGACY_SERVICE_GENERATION_QUERY, count)
+                speedup = old_duration / new_duration if new_duration > 0 else 0
+                line += (f" | стара: {old_duration * 1000:10.1f} мс, різних авто: {old_cars}"
+                         f" | прискорення: x{speedup:.1f}")
+            print(line)
+    finally:
+        model.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import datetime
+import os
+import subprocess
+import sys
+from decimal import Decimal
+
+from run_benchmarks import BACKENDS, reset_database
+
+# Вартість задається і як float (так її дають генератори), і як Decimal
+SERVICE_COSTS = [12.5, 1000.0, 0.1, Decimal("99.99")]
+
+
+def run(rows_per_method, dbname):
+    sys.path.insert(0, BACKENDS["RGR"])
+    import config
+    config.DB_PARAMS["dbname"] = dbname
+    reset_database(config.DB_PARAMS)
+    from model import Model, BULK_LOAD_METHODS
+
+    model = Model()
+    failures = []
+    try:
+        model.generate_cars(10)
+        for method in BULK_LOAD_METHODS:
+            rows = [(i % 10 + 1, datetime.date(2024, 1, 1), f"Перевірка {method}", SERVICE_COSTS[i % len(SERVICE_COSTS)])
+                    for i in range(rows_per_method)]
+            loaded, message = model.bulk_load("service", rows, method=method)
+            print(f"[{method}] {message}")
+            if loaded != rows_per_method:
+                failures.append(f"{method}: завантажено {loaded} з {rows_per_method}")
+                continue
+
+            expected = sum(Decimal(str(cost)) for *_, cost in rows)
+            with model.pool.connection() as conn:
+                stored = conn.execute("SELECT sum(cost) FROM service WHERE description = %s",
+                                      (f"Перевірка {method}",)).fetchone()[0]
+            if stored != expected:
+                failures.append(f"{method}: сума вартості {stored}, очікувалось {expected}")
+    finally:
+        model.close_connection()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Перевірка RGR Model.bulk_load у всіх режимах на таблиці service (numeric-колонка cost).")
+    parser.add_argument("--rows", type=int, default=1000, help="кількість рядків на кожен режим")
+    parser.add_argument("--dbname", default="logistic_bench",
+                        help="окрема БД: її таблиці очищуються перед перевіркою")
+    args = parser.parse_args()
+
+    # Схему створюють міграції lab2 в окремому процесі: config і model обох застосунків мають однакові назви
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_benchmarks.py")
+    subprocess.run([sys.executable, script, "--prepare", "--dbname", args.dbname], check=True)
+    failures = run(args.rows, args.dbname)
+    for failure in failures:
+        print(f"ПОМИЛКА: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
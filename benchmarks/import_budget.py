@@ -0,0 +1,80 @@
+import argparse
+import subprocess
+import sys
+import time
+
+from run_benchmarks import BACKENDS
+
+# Драйвери БД, ORM та numpy не повинні завантажуватися при імпорті контролера чи виводі --help
+HEAVY_PACKAGES = ("sqlalchemy", "psycopg", "psycopg_pool", "numpy")
+
+
+# -X importtime пише в stderr рядки "import time: self [us] | cumulative | imported package";
+# вкладеність імпорту позначається відступом у назві модуля
+def import_times(cwd, module):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+# Повертає (мінімальний час у мс, код завершення останнього запуску)
+def startup_time(cwd, repeat):
+    durations = []
+    returncode = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        returncode = subprocess.run([sys.executable, "main.py", "--help"], cwd=cwd, capture_output=True,
+                                    stdin=subprocess.DEVNULL).returncode
+        durations.append((time.perf_counter() - start_time) * 1000)
+    return min(durations), returncode
+
+
+def check_backend(backend, import_budget_ms, startup_budget_ms, repeat):
+    cwd = BACKENDS[backend]
+    failures = []
+
+    times = import_times(cwd, "controller")
+    heavy = sorted({name for name in times if name.split(".")[0] in HEAVY_PACKAGES})
+    if heavy:
+        failures.append(f"імпорт контролера завантажує {', '.join(heavy[:5])}")
+    if times["controller"] > import_budget_ms:
+        failures.append(f"імпорт контролера {times['controller']:.1f} мс > {import_budget_ms} мс")
+
+    startup_ms, returncode = startup_time(cwd, repeat)
+    if returncode:
+        failures.append(f"main.py --help завершився з кодом {returncode}")
+    elif startup_ms > startup_budget_ms:
+        failures.append(f"main.py --help {startup_ms:.1f} мс > {startup_budget_ms} мс")
+
+    print(f"[{backend}] import controller: {times['controller']:.1f} мс, main.py --help: {startup_ms:.1f} мс")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перевірка бюджету часу імпорту та старту обох застосунків.")
+    parser.add_argument("--backends", default="RGR,lab2")
+    parser.add_argument("--import-budget-ms", type=float, default=20.0,
+                        help="допустимий сумарний час імпорту controller (-X importtime)")
+    parser.add_argument("--startup-budget-ms", type=float, default=80.0,
+                        help="допустимий час 'python main.py --help' з урахуванням старту інтерпретатора")
+    parser.add_argument("--repeat", type=int, default=5, help="кількість запусків main.py --help (береться мінімум)")
+    args = parser.parse_args()
+
+    failures = []
+    for backend in args.backends.split(","):
+        failures += [f"[{backend}] {failure}" for failure in
+                     check_backend(backend, args.import_budget_ms, args.startup_budget_ms, args.repeat)]
+
+    for failure in failures:
+        print(f"ПОМИЛКА: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKENDS = {"RGR": os.path.join(ROOT, "RGR"), "lab2": os.path.join(ROOT, "lab2")}
+TABLES = ["car", "driver", "route", "customer", "trip", "service"]
+SEARCH_PARAMS = [(0, 1000000, '%'), (5000, 20000, 'Volv%'), (10000, 12000, '%an%'), (20000, 25000, 'DAF')]
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def is_error(result):
+    if isinstance(result, tuple):
+        if result[0] is None:
+            return True
+        result = next((item for item in result if isinstance(item, str)), "")
+    return isinstance(result, str) and "помилка" in result.lower()
+
+
+def measure_calls(calls):
+    durations = []
+    errors = 0
+    started = time.perf_counter()
+    for call in calls:
+        start_time = time.perf_counter()
+        result = call()
+        durations.append((time.perf_counter() - start_time) * 1000)
+        errors += is_error(result)
+    total = time.perf_counter() - started
+    durations.sort()
+    return {
+        "calls": len(durations),
+        "errors": errors,
+        "ops_per_sec": round(len(durations) / total, 1) if total > 0 else 0.0,
+        "p50_ms": round(percentile(durations, 50), 3),
+        "p95_ms": round(percentile(durations, 95), 3),
+        "p99_ms": round(percentile(durations, 99), 3),
+    }
+
+
+def measure_generation(method, count):
+    start_time = time.perf_counter()
+    result = method(count)
+    duration = time.perf_counter() - start_time
+    return {
+        "rows": count,
+        "errors": int(is_error(result)),
+        "seconds": round(duration, 3),
+        "rows_per_sec": round(count / duration, 1) if duration > 0 else 0.0,
+    }
+
+
+def reset_database(db_params):
+    import psycopg
+    with psycopg.connect(**db_params, autocommit=True) as conn:
+        conn.execute("TRUNCATE trip, service, car, driver, customer, route RESTART IDENTITY CASCADE")
+
+
+def run_scale(model, scale, ops):
+    sizes = {"car": max(scale // 100, 10), "driver": max(scale // 100, 10), "route": max(scale // 1000, 10),
+             "customer": max(scale // 100, 10), "trip": scale, "service": scale // 10}
+    results = {}
+
+    for table, method in [("car", model.generate_cars), ("driver", model.generate_drivers),
+                          ("route", model.generate_routes), ("customer", model.generate_customers),
+                          ("trip", model.generate_trips), ("service", model.generate_service)]:
+        results[f"generate_{table}"] = measure_generation(method, sizes[table])
+
+    def ids(table):
+        return [str(random.randint(1, sizes[table])) for _ in range(ops)]
+
+    results["add_car"] = measure_calls(
+        [lambda i=i: model.add_car(f"BENCH{i:012d}", f"BP{i:08d}", "Volvo", "20000") for i in range(ops)])
+    results["add_driver"] = measure_calls(
+        [lambda i=i: model.add_driver(f"BD{i:08d}", "Бенчмарк", "Тест", "CE") for i in range(ops)])
+    results["add_customer"] = measure_calls(
+        [lambda i=i: model.add_customer("ТОВ Бенч", "+380000000000", f"bench{i}@example.com", "м. Київ")
+         for i in range(ops)])
+    results["add_route"] = measure_calls(
+        [lambda: model.add_route("Київ", "Варшава", "800") for _ in range(ops)])
+    results["add_service"] = measure_calls(
+        [lambda car_id=car_id: model.add_service(car_id, "2024-01-01", "Бенчмарк", "1000.00")
+         for car_id in ids("car")])
+    results["add_trip"] = measure_calls(
+        [lambda car_id=car_id: model.add_trip("2024-01-01", "2024-01-02", "2024-01-03", "Бенчмарк", "5000",
+                                              car_id, "1", "1", "1")
+         for car_id in ids("car")])
+
+    results["update_car"] = measure_calls(
+        [lambda record_id=record_id: model.update_car(record_id, "Scania", "21000") for record_id in ids("car")])
+    results["update_driver"] = measure_calls(
+        [lambda record_id=record_id: model.update_driver(record_id, "Оновлено", "", "C") for record_id in ids("driver")])
+    results["update_customer"] = measure_calls(
+        [lambda record_id=record_id: model.update_customer(record_id, "+380111111111", "")
+         for record_id in ids("customer")])
+    results["update_route"] = measure_calls(
+        [lambda record_id=record_id: model.update_route(record_id, "900") for record_id in ids("route")])
+    results["update_service"] = measure_calls(
+        [lambda record_id=record_id: model.update_service(record_id, "Оновлено", "2000.00")
+         for record_id in ids("service")])
+    results["update_trip"] = measure_calls(
+        [lambda record_id=record_id: model.update_trip(record_id, "Оновлено", "7000") for record_id in ids("trip")])
+
+    for table in TABLES:
+        results[f"get_all_data_{table}"] = measure_calls(
+            [lambda table=table: model.get_all_data(table) for _ in range(ops)])
+
+    # Кеш пошуку вимикається (maxsize 0), щоб замір відображав сам запит, а не пошук у кеші
+    search_params = (SEARCH_PARAMS * (ops // len(SEARCH_PARAMS) + 1))[:max(ops // 10, len(SEARCH_PARAMS))]
+    maxsize = model.search_cache.maxsize
+    model.search_cache.maxsize = 0
+    model.search_cache.clear()
+    results["search_trips_complex"] = measure_calls(
+        [lambda params=params: model.search_trips_complex(*params) for params in search_params])
+
+    # Шлях з кешу окремо: після розігріву кожен виклик є влучанням
+    model.search_cache.maxsize = maxsize
+    for params in SEARCH_PARAMS:
+        model.search_trips_complex(*params)
+    results["search_trips_complex_cached"] = measure_calls(
+        [lambda params=params: model.search_trips_complex(*params) for params in search_params])
+
+    # Видаляються лише рядки без залежних записів: рейси та обслуговування
+    for table in ("trip", "service"):
+        record_ids = random.sample(range(1, sizes[table] + 1), min(ops, sizes[table]))
+        results[f"delete_data_dynamic_{table}"] = measure_calls(
+            [lambda record_id=record_id, table=table: model.delete_data_dynamic(table, f"{table}_id", str(record_id))
+             for record_id in record_ids])
+    return results
+
+
+# Кожен бекенд запускається в окремому процесі: обидва каталоги містять модулі
+# з однаковими назвами (config, model, view), які не можуть співіснувати в одному процесі.
+def run_backend(backend, scales, ops, seed, dbname, output):
+    sys.path.insert(0, BACKENDS[backend])
+    import config
+    config.DB_PARAMS["dbname"] = dbname
+
+    results = {}
+    for scale in scales:
+        random.seed(seed)
+        reset_database(config.DB_PARAMS)
+        from model import Model
+        model = Model()
+        try:
+            print(f"[{backend}] масштаб {scale}...", file=sys.stderr)
+            results[str(scale)] = run_scale(model, scale, ops)
+        finally:
+            model.close_connection()
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+
+def prepare_database(dbname):
+    sys.path.insert(0, BACKENDS["lab2"])
+    import psycopg
+    import config
+    admin_params = dict(config.DB_PARAMS, dbname="postgres")
+    with psycopg.connect(**admin_params, autocommit=True) as conn:
+        if not conn.execute("SELECT 1 FROM pg_database WHERE datname = %s", (dbname,)).fetchone():
+            conn.execute(f'CREATE DATABASE "{dbname}"')
+
+    config.DB_PARAMS["dbname"] = dbname
+    import migrations
+    for version, description, status in migrations.migrate():
+        if status != "OK":
+            raise RuntimeError(f"Міграція {version} ({description}): {status}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Порівняльний бенчмарк бекендів RGR (psycopg) та lab2 (SQLAlchemy).")
+    parser.add_argument("--scales", default="10000,100000,1000000",
+                        help="масштаби (кількість рейсів) через кому")
+    parser.add_argument("--backends", default="RGR,lab2")
+    parser.add_argument("--ops", type=int, default=200, help="кількість викликів для кожної операції CRUD")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dbname", default="logistic_bench",
+                        help="окрема БД для бенчмарку: її таблиці очищуються перед кожним масштабом")
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results.json"))
+    parser.add_argument("--worker", choices=list(BACKENDS), help=argparse.SUPPRESS)
+    parser.add_argument("--prepare", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    if args.prepare:
+        prepare_database(args.dbname)
+        return
+    if args.worker:
+        run_backend(args.worker, scales, args.ops, args.seed, args.dbname, args.output)
+        return
+
+    script = os.path.abspath(__file__)
+    common = ["--scales", args.scales, "--ops", str(args.ops), "--seed", str(args.seed), "--dbname", args.dbname]
+    subprocess.run([sys.executable, script, "--prepare"] + common, check=True)
+
+    report = {
+        "meta": {"commit": git_commit(), "python": platform.python_version(), "scales": scales,
+                 "ops": args.ops, "seed": args.seed},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends.split(","):
+            output = os.path.join(tmp, f"{backend}.json")
+            subprocess.run([sys.executable, script, "--worker", backend, "--output", output] + common,
+                           cwd=BACKENDS[backend], check=True, stdout=subprocess.DEVNULL)
+            with open(output, encoding="utf-8") as f:
+                report["results"][backend] = json.load(f)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Результати збережено у '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
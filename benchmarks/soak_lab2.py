@@ -0,0 +1,102 @@
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+from run_benchmarks import BACKENDS, SEARCH_PARAMS, TABLES, is_error, prepare_database, reset_database
+
+# Початкові обсяги таблиць для тривалого прогону
+SEED_SIZES = {"car": 200, "driver": 200, "route": 50, "customer": 200, "trip": 5000, "service": 500}
+
+
+def mixed_operations(model, sizes):
+    def car_id():
+        return str(random.randint(1, sizes["car"]))
+
+    def trip_id():
+        return str(random.randint(1, sizes["trip"]))
+
+    return [
+        (30, "get_page", lambda: model.get_page(random.choice(TABLES))),
+        (20, "search", lambda: model.search_trips_complex(*random.choice(SEARCH_PARAMS))),
+        (15, "update_car", lambda: model.update_car(car_id(), random.choice(["Volvo", "MAN", "DAF"]), "")),
+        (15, "update_trip", lambda: model.update_trip(trip_id(), "Тривалий прогін", str(random.randint(1000, 30000)))),
+        (10, "add_trip", lambda: model.add_trip("2024-01-01", "2024-01-02", "", "Тривалий прогін", "5000",
+                                                car_id(), "1", "1", "1")),
+        (5, "add_car", lambda: model.add_car(uuid.uuid4().hex[:17].upper(), uuid.uuid4().hex[:12].upper(),
+                                             "Volvo", "20000")),
+        # Повторне видалення того самого id — звичайний результат "не знайдено", а не помилка
+        (5, "delete_trip", lambda: model.delete_many("trip", [trip_id()])[0]),
+    ]
+
+
+def run(ops, warmup, max_growth_mb, seed):
+    sys.path.insert(0, BACKENDS["lab2"])
+    import config
+    reset_database(config.DB_PARAMS)
+    from model import Model
+
+    random.seed(seed)
+    model = Model()
+    try:
+        for table, method in [("car", model.generate_cars), ("driver", model.generate_drivers),
+                              ("route", model.generate_routes), ("customer", model.generate_customers),
+                              ("trip", model.generate_trips), ("service", model.generate_service)]:
+            method(SEED_SIZES[table])
+
+        operations = mixed_operations(model, SEED_SIZES)
+        weights = [weight for weight, _, _ in operations]
+        errors = {name: 0 for _, name, _ in operations}
+
+        def step():
+            _, name, call = random.choices(operations, weights)[0]
+            errors[name] += is_error(call())
+
+        # Розігрів: кеш скомпільованих запитів, пул з'єднань і кеш пошуку заповнюються до заміру
+        for _ in range(warmup):
+            step()
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        for i in range(1, ops + 1):
+            step()
+            if i % 10000 == 0:
+                current, _ = tracemalloc.get_traced_memory()
+                print(f"{i} операцій, приріст пам'яті {(current - baseline) / 2 ** 20:.2f} МБ", file=sys.stderr)
+        duration = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        model.close_connection()
+
+    growth_mb = (current - baseline) / 2 ** 20
+    print(f"Операцій: {ops} за {duration:.1f} с ({ops / duration:.0f} оп/с)")
+    print(f"Помилок за типом: {errors}")
+    print(f"Приріст пам'яті: {growth_mb:.2f} МБ, пік: {(peak - baseline) / 2 ** 20:.2f} МБ, "
+          f"межа: {max_growth_mb:.2f} МБ")
+    if growth_mb > max_growth_mb:
+        print("ПОМИЛКА: Перевищено межу пам'яті.")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Тривалий прогін lab2 Model: змішані операції та контроль пам'яті.")
+    parser.add_argument("--ops", type=int, default=100000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--max-growth-mb", type=float, default=16.0,
+                        help="допустимий приріст пам'яті (tracemalloc) після розігріву")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dbname", default="logistic_bench",
+                        help="окрема БД: її таблиці очищуються перед прогоном")
+    args = parser.parse_args()
+
+    prepare_database(args.dbname)
+    sys.exit(run(args.ops, args.warmup, args.max_growth_mb, args.seed))
+
+
+if __name__ == "__main__":
+    main()
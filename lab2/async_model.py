@@ -0,0 +1,395 @@
+import time
+
+from sqlalchemy import insert, update, text
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from database import create_async_session_factory
+from orm_models import Car, Driver, Customer, Route, Trip, Service
+from config import PAGE_SIZE, DELETE_BATCH_SIZE, STREAM_ITERSIZE, GENERATION_BATCH_SIZE, SEARCH_CACHE
+from fk_sampler import AsyncFKSampler
+from metrics import instrument_engine
+from cache import SearchCache
+from model import (METRICS, MODEL_CLASSES, SEARCH_TABLES, page_statement, trip_search_statement, delete_statement,
+                   delete_error, search_key, car_rows, driver_rows, route_rows, customer_rows, trip_rows,
+                   service_rows, batches)
+
+
+# Кешований результат пошуку віддається тим самим інтерфейсом (async for), що й потік з БД
+async def iter_rows(rows):
+    for row in rows:
+        yield row
+
+
+# Асинхронна версія Model з тим самим набором методів поверх AsyncSession.
+# Одна AsyncSession не допускає паралельних запитів, тому кожен метод відкриває
+# власну сесію з фабрики — так один цикл подій може виконувати багато запитів одночасно.
+# На Windows psycopg потребує SelectorEventLoop:
+#     asyncio.run(main(), loop_factory=asyncio.SelectorEventLoop)
+class AsyncModel:
+    def __init__(self):
+        self.engine, self.session = create_async_session_factory()
+        instrument_engine(self.engine.sync_engine, METRICS)
+        self.fk_sampler = AsyncFKSampler(self.session)
+        self.metrics = METRICS
+        # Кеш спільний для всіх корутин: звернення до нього не містять await, тож не перемежовуються
+        self.search_cache = SearchCache(**SEARCH_CACHE)
+        self._use_search_table = None
+
+    # Перевіряється при першому пошуку, як і Model.use_search_table
+    async def use_search_table(self):
+        if self._use_search_table is None:
+            try:
+                async with self.session() as session:
+                    self._use_search_table = bool(
+                        (await session.execute(text("SELECT to_regclass('trip_search') IS NOT NULL"))).scalar())
+            except SQLAlchemyError:
+                return False
+        return self._use_search_table
+
+    async def close_connection(self):
+        await self.engine.dispose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_connection()
+
+    async def _commit(self, session, table_name):
+        await session.commit()
+        self.search_cache.invalidate(table_name)
+
+    async def get_all_data(self, table_name, columns=None):
+        return await self.get_page(table_name, columns=columns)
+
+    async def get_page(self, table_name, order_by=None, after=None, before=None, limit=PAGE_SIZE, columns=None):
+        model_class = MODEL_CLASSES.get(table_name.lower())
+        if not model_class:
+            return None, "Помилка: Неприпустима назва таблиці."
+
+        page, error = page_statement(model_class, order_by, after, before, limit, columns)
+        if error:
+            return None, error
+
+        statement, _, descending = page
+        try:
+            async with self.session() as session:
+                result = [tuple(row) for row in await session.execute(statement)]
+            if descending:
+                result.reverse()
+            return result, "Запит успішно виконано."
+        except SQLAlchemyError as e:
+            return None, f"Помилка отримання даних: {e}"
+
+    async def _add(self, record):
+        async with self.session() as session:
+            session.add(record)
+            await self._commit(session, record.__tablename__)
+        return record
+
+    async def add_car(self, vin, license_plate, brand, load_capacity):
+        try:
+            car = await self._add(Car(vin=vin, license_plate=license_plate, brand=brand,
+                                      load_capacity=int(load_capacity)))
+            return f"Успішно додано автомобіль (ID: {car.car_id}).", True
+        except ValueError:
+            return "Помилка: Вантажопідйомність має бути числом.", False
+        except IntegrityError:
+            return "Помилка: VIN або номер вже існують.", False
+        except Exception as e:
+            return f"Помилка: {e}", False
+
+    async def add_driver(self, license_number, surname, name, license_category):
+        try:
+            driver = await self._add(Driver(license_number=license_number, surname=surname, name=name,
+                                            license_category=license_category))
+            return f"Успішно додано водія (ID: {driver.driver_id}).", True
+        except IntegrityError:
+            return "Помилка: Водій з таким номером вже існує.", False
+        except Exception as e:
+            return f"Помилка: {e}", False
+
+    async def add_customer(self, full_name, phone, email, address):
+        try:
+            await self._add(Customer(full_name=full_name, phone=phone, email=email, address=address))
+            return "Успішно додано клієнта.", True
+        except IntegrityError:
+            return "Помилка: Email вже зайнятий.", False
+        except Exception as e:
+            return f"Помилка: {e}", False
+
+    async def add_route(self, departure, destination, distance):
+        try:
+            await self._add(Route(departure_point=departure, destination_point=destination,
+                                  distance_km=int(distance)))
+            return "Успішно додано маршрут.", True
+        except ValueError:
+            return "Помилка: Відстань має бути числом.", False
+        except Exception as e:
+            return f"Помилка: {e}", False
+
+    async def add_service(self, car_id, service_date, description, cost):
+        try:
+            await self._add(Service(car_id=int(car_id), service_date=service_date, description=description,
+                                    cost=float(cost)))
+            return "Успішно додано запис про сервіс.", True
+        except IntegrityError:
+            return "Помилка: Автомобіль з таким ID не існує.", False
+        except ValueError:
+            return "Помилка типів даних.", False
+        except Exception as e:
+            return f"Помилка: {e}", False
+
+    async def add_trip(self, departure, arrival, return_d, cargo_desc, cargo_weight, car_id, driver_id, route_id,
+                       customer_id):
+        try:
+            await self._add(Trip(
+                departure_date=departure,
+                arrival_date=arrival,
+                return_date=return_d if return_d else None,
+                cargo_description=cargo_desc,
+                cargo_weight=int(cargo_weight),
+                car_id=int(car_id),
+                driver_id=int(driver_id),
+                route_id=int(route_id),
+                customer_id=int(customer_id)
+            ))
+            return "Успішно додано рейс.", True
+        except ValueError:
+            return "Помилка: Введіть коректні числові дані.", False
+        except IntegrityError as e:
+            return f"Помилка цілісності (перевірте ID): {e}", False
+        except Exception as e:
+            return f"Помилка: {e}", False
+
+    async def _update_record(self, model_class, record_id, fields, values):
+        changes = {field: value for field, value in zip(fields, values) if value}
+        if not changes:
+            return "Немає даних для оновлення."
+
+        key = model_class.__mapper__.primary_key[0]
+        try:
+            statement = update(model_class).where(key == record_id).values(changes).returning(key) \
+                .execution_options(synchronize_session=False)
+            async with self.session() as session:
+                updated = (await session.execute(statement)).scalar()
+                if updated is None:
+                    return f"Запис з ID {record_id} не знайдено."
+                await self._commit(session, model_class.__tablename__)
+            return f"Запис (ID: {record_id}) оновлено."
+        except Exception as e:
+            return f"Помилка оновлення: {e}"
+
+    async def update_car(self, car_id, brand, load_capacity):
+        try:
+            lc = int(load_capacity) if load_capacity else None
+            return await self._update_record(Car, int(car_id), ["brand", "load_capacity"], [brand, lc])
+        except ValueError:
+            return "Помилка числа."
+
+    async def update_driver(self, driver_id, surname, name, category):
+        return await self._update_record(Driver, int(driver_id), ["surname", "name", "license_category"],
+                                         [surname, name, category])
+
+    async def update_customer(self, customer_id, phone, email):
+        return await self._update_record(Customer, int(customer_id), ["phone", "email"], [phone, email])
+
+    async def update_route(self, route_id, distance):
+        try:
+            d = int(distance) if distance else None
+            return await self._update_record(Route, int(route_id), ["distance_km"], [d])
+        except ValueError:
+            return "Помилка числа."
+
+    async def update_service(self, service_id, description, cost):
+        try:
+            c = float(cost) if cost else None
+            return await self._update_record(Service, int(service_id), ["description", "cost"], [description, c])
+        except ValueError:
+            return "Помилка числа."
+
+    async def update_trip(self, trip_id, cargo_desc, cargo_weight):
+        try:
+            w = int(cargo_weight) if cargo_weight else None
+            return await self._update_record(Trip, int(trip_id), ["cargo_description", "cargo_weight"],
+                                             [cargo_desc, w])
+        except ValueError:
+            return "Помилка числа."
+
+    # Як і в Model: видалення порціями DELETE_BATCH_SIZE, помилка посередині називає
+    # кількість уже видалених рядків
+    async def delete_data_dynamic(self, table_name, field, value):
+        model_class = MODEL_CLASSES.get(table_name.lower())
+        if not model_class:
+            return "Невірна таблиця."
+
+        statement, error = delete_statement(model_class, field, value=value, batch_size=DELETE_BATCH_SIZE)
+        if error:
+            return error
+        _, count, error = await self._delete_batches(model_class, statement, DELETE_BATCH_SIZE)
+        if error:
+            return error
+        if not count:
+            return f"0 rows affected (Запис {field}={value} не знайдено)."
+        return f"Deleted successfully! {count} рядків видалено."
+
+    async def delete_where(self, table_name, field, value=None, min_value=None, max_value=None, values=None,
+                           returning=False, batch_size=None):
+        model_class = MODEL_CLASSES.get(table_name.lower())
+        if not model_class:
+            return None, "Помилка: Неприпустима назва таблиці."
+
+        statement, error = delete_statement(model_class, field, value, min_value, max_value, values, returning,
+                                            batch_size)
+        if error:
+            return None, error
+        deleted_ids, deleted, error = await self._delete_batches(model_class, statement, batch_size, returning)
+        result = deleted_ids if returning else deleted
+        if error:
+            return (result if deleted else None), error
+        return result, f"Видалено {deleted} рядків з '{table_name}'."
+
+    async def _delete_batches(self, model_class, statement, batch_size, returning=False):
+        deleted_ids = []
+        deleted = 0
+        try:
+            async with self.session() as session:
+                while True:
+                    result = await session.execute(statement)
+                    if returning:
+                        batch = result.scalars().all()
+                        deleted_ids.extend(batch)
+                        count = len(batch)
+                    else:
+                        count = result.rowcount
+                    deleted += count
+                    await self._commit(session, model_class.__tablename__)
+                    if not batch_size or count < batch_size:
+                        break
+        except Exception as e:
+            return deleted_ids, deleted, delete_error(e, deleted)
+        return deleted_ids, deleted, None
+
+    async def _insert_rows(self, model_class, rows):
+        statement = insert(model_class.__table__)
+        async with self.session() as session:
+            for batch in batches(rows, GENERATION_BATCH_SIZE):
+                await session.execute(statement, batch)
+            await self._commit(session, model_class.__tablename__)
+
+    async def generate_cars(self, count):
+        try:
+            await self._insert_rows(Car, car_rows(count))
+            return count, f"Успішно згенеровано {count} авто."
+        except Exception as e:
+            return None, f"Помилка генерації: {e}"
+
+    async def generate_drivers(self, count):
+        try:
+            await self._insert_rows(Driver, driver_rows(count))
+            return count, f"Успішно згенеровано {count} водіїв."
+        except Exception as e:
+            return None, f"Помилка генерації: {e}"
+
+    async def generate_routes(self, count):
+        try:
+            await self._insert_rows(Route, route_rows(count))
+            return count, f"Успішно згенеровано {count} маршрутів."
+        except Exception as e:
+            return None, f"Помилка: {e}"
+
+    async def generate_customers(self, count):
+        try:
+            await self._insert_rows(Customer, customer_rows(count))
+            return count, f"Успішно згенеровано {count} клієнтів."
+        except Exception as e:
+            return None, f"Помилка: {e}"
+
+    async def generate_trips(self, count):
+        try:
+            car_ids = await self.fk_sampler.ids(Car.car_id)
+            driver_ids = await self.fk_sampler.ids(Driver.driver_id)
+            route_ids = await self.fk_sampler.ids(Route.route_id)
+            customer_ids = await self.fk_sampler.ids(Customer.customer_id)
+
+            if not all([car_ids, driver_ids, route_ids, customer_ids]):
+                return None, "Помилка: Батьківські таблиці порожні. Спочатку згенеруйте їх."
+
+            await self._insert_rows(Trip, trip_rows(count, car_ids, driver_ids, route_ids, customer_ids))
+            return count, f"Успішно згенеровано {count} рейсів."
+        except Exception as e:
+            return None, f"Помилка генерації рейсів: {e}"
+
+    async def generate_service(self, count):
+        try:
+            car_ids = await self.fk_sampler.ids(Car.car_id)
+            if not car_ids:
+                return None, "Помилка: Немає авто. Спочатку згенеруйте 'car'."
+
+            await self._insert_rows(Service, service_rows(count, car_ids))
+            return count, f"Успішно згенеровано {count} сервісних записів."
+        except Exception as e:
+            return None, f"Помилка: {e}"
+
+    async def search_trips_complex(self, min_weight, max_weight, brand_pattern):
+        try:
+            start_time = time.perf_counter()
+            key = search_key(min_weight, max_weight, brand_pattern)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return list(cached), (time.perf_counter() - start_time) * 1000, "Пошук успішний (з кешу)."
+
+            generation = self.search_cache.generation(SEARCH_TABLES)
+            statement = trip_search_statement(min_weight, max_weight, brand_pattern, await self.use_search_table())
+            async with self.session() as session:
+                results = (await session.execute(statement)).all()
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            self.search_cache.put(key, tuple(results), SEARCH_TABLES, generation)
+            return results, duration_ms, "Пошук успішний."
+        except Exception as e:
+            return None, 0, f"Помилка пошуку: {e}"
+
+    # Серверний курсор (yield_per) живе, доки споживач не вичерпає асинхронний ітератор;
+    # сесія закривається разом з ним.
+    async def _stream_rows(self, statement):
+        async with self.session() as session:
+            result = await session.stream(statement.execution_options(yield_per=STREAM_ITERSIZE))
+            async for row in result:
+                yield row
+
+    async def _cache_stream(self, key, generation, rows):
+        collected = []
+        async for row in rows:
+            if collected is not None:
+                collected.append(row)
+                if len(collected) > self.search_cache.max_rows:
+                    collected = None
+            yield row
+        if collected is not None:
+            self.search_cache.put(key, tuple(collected), SEARCH_TABLES, generation)
+
+    # Повертає асинхронний ітератор рядків (async for), час до першого рядка та повідомлення
+    async def stream_trips_complex(self, min_weight, max_weight, brand_pattern):
+        try:
+            start_time = time.perf_counter()
+            key = search_key(min_weight, max_weight, brand_pattern)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return iter_rows(cached), (time.perf_counter() - start_time) * 1000, "Пошук успішний (з кешу)."
+
+            generation = self.search_cache.generation(SEARCH_TABLES)
+            statement = trip_search_statement(min_weight, max_weight, brand_pattern, await self.use_search_table())
+            rows = self._cache_stream(key, generation, self._stream_rows(statement))
+            start_time = time.perf_counter()
+            first_row = await anext(rows, None)
+            duration_ms = (time.perf_counter() - start_time) * 1000
+        except Exception as e:
+            return None, 0, f"Помилка пошуку: {e}"
+
+        async def chained():
+            if first_row is None:
+                return
+            yield first_row
+            async for row in rows:
+                yield row
+
+        return chained(), duration_ms, "Пошук успішний."
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# LRU-кеш результатів пошуку з TTL. Кожен запис пам'ятає таблиці, від яких залежить,
+# і видаляється при записі в будь-яку з них. Лічильник поколінь не дає покласти в кеш
+# результат, прочитаний до інвалідації (наприклад, під час довгого стрімінгу).
+# time.monotonic не залежить від переведення системного годинника.
+class SearchCache:
+    def __init__(self, maxsize=128, ttl=60, max_rows=10000):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, tables):
+        with self._lock:
+            return self._generation(tables)
+
+    def _generation(self, tables):
+        return (self._epoch,) + tuple(self._generations.get(table, 0) for table in tables)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, tables, generation=None):
+        if self.maxsize <= 0 or len(value) > self.max_rows:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation(tables):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, table):
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if table in entry[1]]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
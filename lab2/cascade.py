@@ -0,0 +1,36 @@
+from sqlalchemy import select, delete, func, or_
+from database import Base
+
+
+# Планувальник каскадного видалення за графом зовнішніх ключів з orm_models.
+# Для кожної залежної таблиці будується умова "fk IN (SELECT pk FROM батьківська WHERE ...)",
+# а порядок видалення — зворотний до топологічного (спершу нащадки, потім батьки),
+# тож жоден DELETE не порушує обмеження FK.
+def _referencing(table):
+    for child in Base.metadata.sorted_tables:
+        for fk in child.foreign_keys:
+            if fk.column.table is table and child is not table:
+                yield child, fk.parent, fk.column
+
+
+def plan_delete(table, condition):
+    conditions = {}
+    pending = [(table, condition)]
+    while pending:
+        current, current_condition = pending.pop()
+        conditions.setdefault(current, []).append(current_condition)
+        for child, fk_column, referenced in _referencing(current):
+            child_condition = fk_column.in_(select(referenced).where(current_condition))
+            pending.append((child, child_condition))
+
+    return [(t, or_(*conditions[t])) for t in reversed(Base.metadata.sorted_tables) if t in conditions]
+
+
+def preview(session, steps):
+    return [(t.name, session.execute(select(func.count()).select_from(t).where(condition)).scalar())
+            for t, condition in steps]
+
+
+# Усі DELETE виконуються в поточній транзакції сесії; фіксує або відкочує її викликач
+def execute(session, steps):
+    return [(t.name, session.execute(delete(t).where(condition)).rowcount) for t, condition in steps]
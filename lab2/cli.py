@@ -0,0 +1,202 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+import view
+from config import PAGE_SIZE
+from controller import TABLE_HEADERS
+
+# Коди завершення: 0 — успіх, 1 — помилка операції або БД, 2 — неправильні аргументи (argparse)
+EXIT_OK = 0
+EXIT_FAILURE = 1
+
+GENERATE_KINDS = ["cars", "drivers", "routes", "customers", "trips", "service"]
+SEARCH_HEADERS = ["trip_id", "cargo_description", "cargo_weight", "brand", "license_plate", "driver_full_name"]
+EXPORT_PAGE_SIZE = 5000
+
+
+def positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("має бути додатнім числом")
+    return number
+
+
+# Модель (SQLAlchemy і драйвер БД) імпортується лише для підкоманд, яким потрібна БД
+def open_model():
+    from model import Model
+    model = Model()
+    try:
+        model.ping()
+    except Exception as e:
+        print(f"Помилка підключення до БД: {e}", file=sys.stderr)
+        return None
+    return model
+
+
+# Рядки пишуться потоково, тож вивід великого результату не тримається в пам'яті
+def write_rows(rows, headers, output_format, out=sys.stdout):
+    if output_format == "table":
+        return view.show_list(rows, headers)
+
+    count = 0
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+
+    out.write("[")
+    for row in rows:
+        out.write(("," if count else "") + "\n" + json.dumps(dict(zip(headers, row)), ensure_ascii=False, default=str))
+        count += 1
+    out.write("\n]\n")
+    return count
+
+
+# Уся таблиця keyset-сторінками; помилка читання будь-якої сторінки перериває вивід
+def table_rows(model, table_name, page_size, order_by=None, columns=None):
+    rows, message = model.get_page(table_name, order_by=order_by, limit=page_size, columns=columns)
+    while rows:
+        yield from rows
+        if len(rows) < page_size:
+            return
+        rows, message = model.get_page(table_name, order_by=order_by, after=rows[-1], limit=page_size,
+                                       columns=columns)
+    if rows is None:
+        raise RuntimeError(message)
+
+
+def run_generate(args):
+    method = f"generate_{args.kind}"
+    if args.workers > 1:
+        import parallel
+        rowcount, message = parallel.generate_parallel(method, args.count, args.workers)
+    else:
+        model = open_model()
+        if model is None:
+            return EXIT_FAILURE
+        try:
+            rowcount, message = getattr(model, method)(args.count)
+        finally:
+            model.close_connection()
+    print(message)
+    # Успіх — лише якщо згенеровано всі запитані рядки (None означає помилку)
+    return EXIT_OK if rowcount == args.count else EXIT_FAILURE
+
+
+def run_search(args):
+    model = open_model()
+    if model is None:
+        return EXIT_FAILURE
+    try:
+        rows, duration_ms, message = model.stream_trips_complex(args.min, args.max, args.brand)
+        if rows is None:
+            print(message, file=sys.stderr)
+            return EXIT_FAILURE
+        try:
+            count = write_rows(rows, SEARCH_HEADERS, args.format)
+        except BrokenPipeError:
+            raise
+        except Exception as e:
+            # Помилка БД посеред потоку: частину рядків уже виведено, але результат неповний
+            print(f"Помилка пошуку: {e}", file=sys.stderr)
+            return EXIT_FAILURE
+        print(f"{message} Знайдено {count} рядків. Час до перших рядків: {duration_ms:.2f} мс.", file=sys.stderr)
+        return EXIT_OK
+    finally:
+        model.close_connection()
+
+
+def run_browse(args):
+    model = open_model()
+    if model is None:
+        return EXIT_FAILURE
+    try:
+        rows, message = model.get_page(args.table, order_by=args.order_by, limit=args.limit, columns=args.columns)
+        if rows is None:
+            print(message, file=sys.stderr)
+            return EXIT_FAILURE
+        write_rows(rows, model.page_columns(args.table, args.columns, args.order_by), args.format)
+        return EXIT_OK
+    finally:
+        model.close_connection()
+
+
+def run_export(args):
+    output_format = args.format or ("json" if args.output.lower().endswith(".json") else "csv")
+    model = open_model()
+    if model is None:
+        return EXIT_FAILURE
+    try:
+        headers = model.page_columns(args.table, args.columns, args.order_by)
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            count = write_rows(table_rows(model, args.table, args.page_size, args.order_by, args.columns),
+                               headers, output_format, f)
+        print(f"Експортовано {count} рядків з '{args.table}' у '{args.output}'.", file=sys.stderr)
+        return EXIT_OK
+    except (RuntimeError, OSError) as e:
+        print(f"Помилка експорту: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    finally:
+        model.close_connection()
+
+
+def columns_list(value):
+    return [col.strip() for col in value.split(",") if col.strip()]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Пакетні команди lab2 (SQLAlchemy). Без підкоманди main.py запускає інтерактивне меню.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="згенерувати записи")
+    generate.add_argument("kind", choices=GENERATE_KINDS)
+    generate.add_argument("--count", type=positive_int, required=True)
+    generate.add_argument("--workers", type=positive_int, default=1, help="кількість паралельних процесів")
+    generate.set_defaults(handler=run_generate)
+
+    search = subparsers.add_parser("search", help="комплексний пошук рейсів")
+    search.add_argument("--min", type=int, default=0, help="мінімальна вага вантажу")
+    search.add_argument("--max", type=int, default=1000000, help="максимальна вага вантажу")
+    search.add_argument("--brand", default="%", help="шаблон марки авто (ILIKE), напр. 'Volv%%'")
+    search.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    search.set_defaults(handler=run_search)
+
+    for name, help_text in (("browse", "показати першу сторінку таблиці"), ("export", "експортувати таблицю у файл")):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument("table", choices=list(TABLE_HEADERS))
+        command.add_argument("--order-by", help="колонка сортування (за замовчуванням — первинний ключ)")
+        command.add_argument("--columns", type=columns_list, help="колонки через кому")
+        if name == "browse":
+            command.add_argument("--limit", type=positive_int, default=PAGE_SIZE)
+            command.add_argument("--format", choices=["table", "csv", "json"], default="table")
+            command.set_defaults(handler=run_browse)
+        else:
+            command.add_argument("--output", required=True, help="файл .csv або .json")
+            command.add_argument("--format", choices=["csv", "json"], help="за замовчуванням — за розширенням файлу")
+            command.add_argument("--page-size", type=positive_int, default=EXPORT_PAGE_SIZE)
+            command.set_defaults(handler=run_export)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if getattr(args, "table", None):
+        for col in [args.order_by] + (args.columns or []):
+            if col and col not in TABLE_HEADERS[args.table]:
+                parser.error(f"невідома колонка '{col}'")
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # Споживач виводу (напр. head) закрив канал: решту виводу відкидаємо без трасування
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return EXIT_FAILURE
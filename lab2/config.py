@@ -4,4 +4,27 @@ DB_PARAMS = {
     "password": "1111",
     "host": "localhost",
     "port": "5432"
-}
\ No newline at end of file
+}
+
+PAGE_SIZE = 100
+
+# Розмір порції пакетних операцій (add_many/update_many/delete_many), що виконується
+# в одній точці збереження
+BATCH_SIZE = 1000
+
+# Розмір порції для великих set-based видалень (delete_where з batch_size)
+DELETE_BATCH_SIZE = 5000
+
+# Кількість згенерованих рядків, що створюються в пам'яті та вставляються за раз
+GENERATION_BATCH_SIZE = 10000
+
+# Розмір пакета, який серверний курсор передає клієнту за один fetchmany
+STREAM_ITERSIZE = 2000
+
+# Кеш результатів комплексного пошуку: кількість записів (LRU), час життя в секундах
+# та максимальна кількість рядків результату, який ще кешується
+SEARCH_CACHE = {
+    "maxsize": 128,
+    "ttl": 60,
+    "max_rows": 10000,
+}
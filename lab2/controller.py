@@ -1,14 +1,14 @@
-from model import Model
+import os
 import view
-from sqlalchemy import text
+from config import DELETE_BATCH_SIZE
 
+# model, parallel і migrations тягнуть SQLAlchemy та драйвер БД, тому імпортуються
+# у функціях при першому використанні, а не при імпорті контролера
 def run():
+    from model import Model
     model = Model()
 
-    try:
-        model.db.execute(text("SELECT 1"))
-    except Exception as e:
-        view.show_message(f"Не вдалося підключитися до БД. Перевірте config.py.\nПомилка: {e}")
+    if not check_schema_version():
         return
 
     while True:
@@ -26,6 +26,8 @@ def run():
         elif choice == '5':
             run_generate_data_menu(model)
         elif choice == '6':
+            run_maintenance_menu(model)
+        elif choice == '7':
             model.close_connection()
             view.show_message("До побачення!")
             break
@@ -33,40 +35,29 @@ def run():
             view.show_message("Невірний вибір. Спробуйте ще раз.")
 
 
+TABLE_HEADERS = {
+    "car": ["car_id", "vin", "license_plate", "brand", "load_capacity"],
+    "driver": ["driver_id", "license_number", "surname", "name", "license_category"],
+    "route": ["route_id", "departure_point", "destination_point", "distance_km"],
+    "customer": ["customer_id", "full_name", "phone", "email", "address"],
+    "trip": ["trip_id", "departure_date", "arrival_date", "return_date", "cargo_description",
+             "cargo_weight", "car_id", "driver_id", "route_id", "customer_id"],
+    "service": ["service_id", "car_id", "service_date", "description", "cost"],
+}
+
+
 def run_show_data_menu(model):
     options = ["Показати 'Car'", "Показати 'Driver'", "Показати 'Route'",
                "Показати 'Customer'", "Показати 'Trip'", "Показати 'Service'",
                "Комплексний пошук рейсів"]
+    tables = ["car", "driver", "route", "customer", "trip", "service"]
 
     while True:
         view.show_submenu("Меню Перегляду Даних (Show data)", options)
         choice = view.get_user_choice()
 
-        if choice == '1':
-            rows, msg = model.get_all_data("car")
-            if rows: view.show_list(rows, ["car_id", "vin", "license_plate", "brand", "load_capacity"])
-            view.show_message(msg)
-        elif choice == '2':
-            rows, msg = model.get_all_data("driver")
-            if rows: view.show_list(rows, ["driver_id", "license_number", "surname", "name", "license_category"])
-            view.show_message(msg)
-        elif choice == '3':
-            rows, msg = model.get_all_data("route")
-            if rows: view.show_list(rows, ["route_id", "departure_point", "destination_point", "distance_km"])
-            view.show_message(msg)
-        elif choice == '4':
-            rows, msg = model.get_all_data("customer")
-            if rows: view.show_list(rows, ["customer_id", "full_name", "phone", "email", "address"])
-            view.show_message(msg)
-        elif choice == '5':
-            rows, msg = model.get_all_data("trip")
-            if rows: view.show_list(rows,["trip_id", "departure_date", "arrival_date", "return_date", "cargo_description",
-                                     "cargo_weight", "car_id", "driver_id", "route_id", "customer_id"])
-            view.show_message(msg)
-        elif choice == '6':
-            rows, msg = model.get_all_data("service")
-            if rows: view.show_list(rows, ["service_id", "car_id", "service_date", "description", "cost"])
-            view.show_message(msg)
+        if choice in ('1', '2', '3', '4', '5', '6'):
+            browse_table(model, tables[int(choice) - 1])
         elif choice == '7':
             handle_complex_search(model)
         elif choice == '0':
@@ -75,16 +66,67 @@ def run_show_data_menu(model):
             view.show_message("Невірний вибір.")
 
 
+def browse_table(model, table_name):
+    headers = TABLE_HEADERS[table_name]
+    order_by = view.get_order_column(headers)
+    if order_by and order_by not in headers:
+        view.show_message(f"Невідома колонка '{order_by}'.")
+        return
+    order_by = order_by or None
+
+    columns = view.get_columns()
+    unknown = [col for col in columns if col not in headers]
+    if unknown:
+        view.show_message(f"Невідома колонка '{unknown[0]}'.")
+        return
+    columns = columns or None
+    headers = model.page_columns(table_name, columns, order_by)
+
+    rows, msg = model.get_page(table_name, order_by=order_by, columns=columns)
+    page = 1
+    while True:
+        if rows is None:
+            view.show_message(msg)
+            return
+        view.show_list(rows, headers)
+        view.show_message(f"{msg} Сторінка {page}.")
+
+        action = view.get_page_action()
+        if action == 'n':
+            if not rows:
+                continue
+            next_rows, msg = model.get_page(table_name, order_by=order_by, after=rows[-1], columns=columns)
+            if next_rows:
+                rows, page = next_rows, page + 1
+            elif next_rows is not None:
+                msg = "Це остання сторінка."
+        elif action == 'p':
+            if page == 1 or not rows:
+                msg = "Це перша сторінка."
+                continue
+            prev_rows, msg = model.get_page(table_name, order_by=order_by, before=rows[0], columns=columns)
+            if prev_rows:
+                rows, page = prev_rows, page - 1
+            elif prev_rows is not None:
+                msg = "Це перша сторінка."
+        elif action == '0':
+            break
+        else:
+            msg = "Невірний вибір."
+
+
 def handle_complex_search(model):
     try:
         min_w, max_w, pattern = view.get_search_params()
         min_w_int, max_w_int = int(min_w), int(max_w)
-        rows, duration, message = model.search_trips_complex(min_w_int, max_w_int, pattern)
+        rows, duration, message = model.stream_trips_complex(min_w_int, max_w_int, pattern)
         if rows is not None:
             view.show_search_results(rows, duration)
         view.show_message(message)
     except ValueError:
         view.show_message("Помилка: Вага має бути числом.")
+    except Exception as e:
+        view.show_message(f"Помилка пошуку: {e}")
 
 
 def run_add_data_menu(model):
@@ -171,7 +213,8 @@ def run_update_data_menu(model):
 def run_delete_menu(model):
     options = ["Видалити 'Car'", "Видалити 'Driver'", "Видалити 'Customer'",
                "Видалити 'Route'", "Видалити 'Service'",
-               "Видалити 'Trip'"]
+               "Видалити 'Trip'", "Видалити за умовою (дорівнює / діапазон / список)",
+               "Видалити разом із залежними записами"]
 
     while True:
         view.show_submenu("Меню Видалення Даних (Delete data)", options)
@@ -192,6 +235,12 @@ def run_delete_menu(model):
             table_name, id_field = 'service', 'service_id'
         elif choice == '6':
             table_name, id_field = 'trip', 'trip_id'
+        elif choice == '7':
+            handle_conditional_delete(model)
+            continue
+        elif choice == '8':
+            handle_cascade_delete(model)
+            continue
         elif choice == '0':
             break
         else:
@@ -206,6 +255,42 @@ def run_delete_menu(model):
             view.show_message(f"Помилка: {e}")
 
 
+def handle_conditional_delete(model):
+    try:
+        table_name, field, condition = view.get_delete_condition()
+        if not any(condition.values()):
+            view.show_message("Помилка: Не задано умову видалення.")
+            return
+        _, message = model.delete_where(table_name, field, batch_size=DELETE_BATCH_SIZE, **condition)
+        view.show_message(message)
+    except Exception as e:
+        view.show_message(f"Помилка: {e}")
+
+
+def handle_cascade_delete(model):
+    try:
+        table_name, field, value = view.get_cascade_delete_params()
+        counts, message = model.preview_delete_with_dependents(table_name, field, value)
+        if counts is None:
+            view.show_message(message)
+            return
+
+        view.show_list(counts, ["Таблиця", "Буде видалено рядків"])
+        if not any(count for _, count in counts):
+            view.show_message(f"0 rows affected (Запис {field}={value} не знайдено).")
+            return
+        if not view.confirm("Видалити ці записи?"):
+            view.show_message("Видалення скасовано.")
+            return
+
+        counts, message = model.delete_with_dependents(table_name, field, value)
+        if counts is not None:
+            view.show_list(counts, ["Таблиця", "Видалено рядків"])
+        view.show_message(message)
+    except Exception as e:
+        view.show_message(f"Помилка: {e}")
+
+
 def run_generate_data_menu(model):
     options = ["Згенерувати 'Car'", "Згенерувати 'Driver'", "Згенерувати 'Route'",
                "Згенерувати 'Customer'", "Згенерувати 'Trip' (з FK)", "Згенерувати 'Service' (з FK)"]
@@ -214,30 +299,95 @@ def run_generate_data_menu(model):
         view.show_submenu("Меню Генерації Даних (Generate data)", options)
         choice = view.get_user_choice()
 
+        generators = {'1': "generate_cars", '2': "generate_drivers", '3': "generate_routes",
+                      '4': "generate_customers", '5': "generate_trips", '6': "generate_service"}
+
         try:
             if choice == '0':
                 break
+            if choice not in generators:
+                view.show_message("Невірний вибір.")
+                continue
 
             count_str = view.get_generation_count()
             count = int(count_str)
             if count <= 0: raise ValueError("Кількість > 0")
 
-            if choice == '1':
-                view.show_message(model.generate_cars(count))
+            workers_str = view.get_worker_count(os.cpu_count())
+            workers = int(workers_str) if workers_str else 1
+            if workers <= 0: raise ValueError("Кількість процесів > 0")
+
+            if workers > 1:
+                import parallel
+                _, message = parallel.generate_parallel(generators[choice], count, workers)
+                view.show_message(message)
+                # Інші процеси пишуть в обхід цієї моделі, тож кеш пошуку вже неактуальний
+                model.search_cache.clear()
+            else:
+                _, message = getattr(model, generators[choice])(count)
+                view.show_message(message)
+
+        except ValueError as e:
+            view.show_message(f"Помилка: Кількість має бути додатнім числом. {e}")
+        except Exception as e:
+            view.show_message(f"Неочікувана помилка: {e}")
+
+
+# Запит версії схеми при старті водночас перевіряє підключення (False, якщо БД недоступна);
+# нові міграції пропонуються явно, а не застосовуються мовчки
+def check_schema_version():
+    import migrations
+    try:
+        version = migrations.current_version()
+    except Exception as e:
+        view.show_message(f"Не вдалося підключитися до БД. Перевірте config.py.\nПомилка: {e}")
+        return False
+
+    if version < migrations.LATEST_VERSION:
+        view.show_message(f"Схема БД має версію {version}, застосунок очікує {migrations.LATEST_VERSION}.")
+        if view.confirm("Застосувати міграції зараз?"):
+            apply_migrations()
+        else:
+            view.show_message("Міграції можна застосувати пізніше в меню Обслуговування БД.")
+    return True
+
+
+def apply_migrations():
+    import migrations
+    results = migrations.migrate()
+    if results:
+        view.show_list(results, ["Версія", "Міграція", "Статус"])
+    view.show_message(f"Версія схеми БД: {migrations.current_version()}.")
+
+
+def run_maintenance_menu(model):
+    options = ["Статистика запитів", "Експортувати статистику запитів у файл", "Скинути статистику запитів",
+               "Статистика кешу пошуку", "Очистити кеш пошуку", "Застосувати міграції схеми БД"]
+
+    while True:
+        view.show_submenu("Меню Обслуговування БД (Maintenance)", options)
+        choice = view.get_user_choice()
+
+        try:
+            if choice == '0':
+                break
+            elif choice == '1':
+                view.show_query_stats(model.metrics.snapshot())
             elif choice == '2':
-                view.show_message(model.generate_drivers(count))
+                path = view.get_export_path()
+                count = model.metrics.export(path)
+                view.show_message(f"Статистику {count} запитів збережено у '{path}'.")
             elif choice == '3':
-                view.show_message(model.generate_routes(count))
+                model.metrics.reset()
+                view.show_message("Статистику запитів скинуто.")
             elif choice == '4':
-                view.show_message(model.generate_customers(count))
+                view.show_cache_stats(model.search_cache.stats())
             elif choice == '5':
-                view.show_message(model.generate_trips(count))
+                model.search_cache.clear()
+                view.show_message("Кеш пошуку очищено.")
             elif choice == '6':
-                view.show_message(model.generate_service(count))
+                apply_migrations()
             else:
                 view.show_message("Невірний вибір.")
-
-        except ValueError as e:
-            view.show_message(f"Помилка: Кількість має бути додатнім числом. {e}")
         except Exception as e:
-            view.show_message(f"Неочікувана помилка: {e}")
\ No newline at end of file
+            view.show_message(f"Помилка: {e}")
@@ -1,10 +1,29 @@
+import functools
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from config import DB_PARAMS
 
-DATABASE_URL = f"postgresql+psycopg://{DB_PARAMS['user']}:{DB_PARAMS['password']}@{DB_PARAMS['host']}:{DB_PARAMS['port']}/{DB_PARAMS['dbname']}"
+Base = declarative_base()
 
-engine = create_engine(DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+def database_url():
+    return f"postgresql+psycopg://{DB_PARAMS['user']}:{DB_PARAMS['password']}@{DB_PARAMS['host']}:{DB_PARAMS['port']}/{DB_PARAMS['dbname']}"
+
+
+# Рушій і фабрика сесій створюються при першому зверненні, а не при імпорті модуля:
+# драйвер psycopg завантажується лише тоді, коли потрібне з'єднання
+@functools.cache
+def get_engine():
+    return create_engine(database_url(), echo=False)
+
+
+@functools.cache
+def get_sessionmaker():
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+# Асинхронний рушій (psycopg в async-режимі) створюється лише для AsyncModel
+def create_async_session_factory():
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    async_engine = create_async_engine(database_url(), echo=False)
+    return async_engine, async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,85 @@
+from array import array
+
+from sqlalchemy import select, func
+from config import STREAM_ITERSIZE
+
+
+# Джерело id батьківських таблиць для генераторів з FK.
+# Щільні serial-ключі (без пропусків) повертаються як range без читання рядків,
+# решта — як компактний array('q'), який кешується між викликами
+# і дочитується інкрементально (лише id, більші за останній кешований).
+# session — фабрика сесій: кожен виклик відкриває власну сесію і закриває її після читання.
+class FKSampler:
+    def __init__(self, session):
+        self.session = session
+        self._cache = {}
+
+    def ids(self, id_column):
+        with self.session() as session:
+            return self._ids(session, id_column)
+
+    def _ids(self, session, id_column):
+        key = str(id_column)
+        low, high, count = session.execute(
+            select(func.min(id_column), func.max(id_column), func.count(id_column))
+        ).one()
+
+        if not count:
+            self._cache.pop(key, None)
+            return range(0)
+        if high - low + 1 == count:
+            self._cache.pop(key, None)
+            return range(low, high + 1)
+
+        cached = self._cache.get(key)
+        if cached is not None and len(cached) and cached[0] == low and cached[-1] <= high:
+            cached.extend(self._load(session, id_column, after=cached[-1]))
+            # Видалення змінюють кількість — тоді кеш перечитується повністю
+            if len(cached) == count:
+                return cached
+
+        cached = array('q', self._load(session, id_column))
+        self._cache[key] = cached
+        return cached
+
+    def _load(self, session, id_column, after=None):
+        query = select(id_column).order_by(id_column)
+        if after is not None:
+            query = query.where(id_column > after)
+        return session.execute(query.execution_options(yield_per=STREAM_ITERSIZE)).scalars()
+
+
+# Асинхронний варіант для AsyncModel: та сама логіка кешу поверх AsyncSession з фабрики
+class AsyncFKSampler(FKSampler):
+    async def ids(self, id_column):
+        async with self.session() as session:
+            return await self._ids(session, id_column)
+
+    async def _ids(self, session, id_column):
+        key = str(id_column)
+        low, high, count = (await session.execute(
+            select(func.min(id_column), func.max(id_column), func.count(id_column))
+        )).one()
+
+        if not count:
+            self._cache.pop(key, None)
+            return range(0)
+        if high - low + 1 == count:
+            self._cache.pop(key, None)
+            return range(low, high + 1)
+
+        cached = self._cache.get(key)
+        if cached is not None and len(cached) and cached[0] == low and cached[-1] <= high:
+            cached.extend(await self._load(session, id_column, after=cached[-1]))
+            if len(cached) == count:
+                return cached
+
+        cached = array('q', await self._load(session, id_column))
+        self._cache[key] = cached
+        return cached
+
+    async def _load(self, session, id_column, after=None):
+        query = select(id_column).order_by(id_column)
+        if after is not None:
+            query = query.where(id_column > after)
+        return [value async for value in await session.stream_scalars(query)]
@@ -0,0 +1,98 @@
+from sqlalchemy import text
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
+from database import get_engine, Base
+import orm_models  # реєструє таблиці в Base.metadata
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+# Номер довільний, але сталий: один і той самий advisory-lock для всіх процесів застосунку
+MIGRATION_LOCK_ID = 482017
+
+_SCHEMA_VERSION_DDL = """
+                      CREATE TABLE IF NOT EXISTS schema_version
+                      (
+                          version     integer PRIMARY KEY,
+                          description varchar(200) NOT NULL,
+                          applied_at  timestamptz  NOT NULL DEFAULT now()
+                      ) \
+                      """
+
+
+# Таблиці з orm_models.py без індексів (їх створює наступний крок). IF NOT EXISTS
+# пропускає вже наявні таблиці, тож на базі, створеній до появи міграцій, крок лише фіксує версію.
+def _create_tables(conn):
+    for table in Base.metadata.sorted_tables:
+        conn.execute(CreateTable(table, if_not_exists=True))
+
+
+# Індекси з orm_models.py (зокрема ті, яких немає в базах, створених раніше за їх опис у моделях).
+# Триграмний індекс потребує pg_trgm; якщо розширення недоступне на сервері,
+# індекс пропускається — пошук за шаблоном марки працює і без нього, лише повільніше.
+def _create_indexes(conn):
+    trgm_available = conn.execute(
+        text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first() is not None
+    if trgm_available:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if not trgm_available and "gin_trgm_ops" in index.dialect_options["postgresql"]["ops"].values():
+                continue
+            index.create(bind=conn, checkfirst=True)
+
+
+# Покривний індекс ваги без trip_id в INCLUDE не давав index-only scan: його замінює
+# індекс з новою назвою (на новій базі його вже створив крок 2, тоді лишається тільки видалення)
+def _rebuild_cargo_weight_index(conn):
+    conn.execute(text("DROP INDEX IF EXISTS trip_cargo_weight_idx"))
+    index = next(index for index in orm_models.Trip.__table__.indexes if index.name == "trip_cargo_weight_cover_idx")
+    index.create(bind=conn, checkfirst=True)
+
+
+# Кроки у порядку застосування: (версія, опис, функція(з'єднання)).
+# Нові кроки лише додаються в кінець, вже застосовані не змінюються.
+MIGRATIONS = [
+    (1, "Таблиці ORM-моделей", _create_tables),
+    (2, "Індекси для FK та комплексного пошуку", _create_indexes),
+    (3, "Покривний індекс ваги з trip_id", _rebuild_cargo_weight_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# Один запит при старті: відсутня таблиця версій означає версію 0
+def current_version(bind=None):
+    bind = bind or get_engine()
+    try:
+        with bind.connect() as conn:
+            return conn.execute(text(f"SELECT coalesce(max(version), 0) FROM {SCHEMA_VERSION_TABLE}")).scalar()
+    except ProgrammingError:
+        return 0
+
+
+# Кожен крок виконується в окремій транзакції разом із записом своєї версії,
+# тож невдалий крок не залишає частково змінену схему. Advisory-lock не дає
+# двом процесам застосувати той самий крок одночасно; після першої помилки решта
+# кроків не виконується. Повертає список (версія, опис, статус).
+def migrate(bind=None):
+    bind = bind or get_engine()
+    results = []
+    for version, description, apply in MIGRATIONS:
+        try:
+            with bind.begin() as conn:
+                conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+                conn.execute(text(_SCHEMA_VERSION_DDL))
+                applied = conn.execute(text(f"SELECT 1 FROM {SCHEMA_VERSION_TABLE} WHERE version = :version"),
+                                       {"version": version}).first()
+                if applied:
+                    continue
+                apply(conn)
+                conn.execute(text(f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, description) "
+                                  f"VALUES (:version, :description)"),
+                             {"version": version, "description": description})
+            results.append((version, description, "OK"))
+        except SQLAlchemyError as e:
+            results.append((version, description, f"Помилка: {e}"))
+            break
+    return results
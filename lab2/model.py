@@ -1,46 +1,334 @@
+import functools
+import itertools
 import time
+from contextlib import contextmanager
 import random
 import datetime
 import uuid
 import sqlalchemy
+from sqlalchemy import tuple_, and_, or_, cast, insert, update, delete, select, table, column, text
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from database import SessionLocal, engine, Base
+from database import get_engine, get_sessionmaker
 from orm_models import Car, Driver, Customer, Route, Trip, Service
-
-Base.metadata.create_all(bind=engine)
-
+from config import PAGE_SIZE, BATCH_SIZE, DELETE_BATCH_SIZE, STREAM_ITERSIZE, SEARCH_CACHE, GENERATION_BATCH_SIZE
+from fk_sampler import FKSampler
+from metrics import QueryMetrics, instrument_engine
+from cache import SearchCache
+import cascade
+
+METRICS = QueryMetrics()
+instrument_engine(get_engine(), METRICS)
+
+
+MODEL_CLASSES = {
+    'car': Car,
+    'driver': Driver,
+    'customer': Customer,
+    'route': Route,
+    'trip': Trip,
+    'service': Service
+}
+
+BRANDS = ['Volvo', 'MAN', 'Scania', 'Mercedes', 'DAF']
+SURNAMES = ['Іваненко', 'Петренко', 'Сидоренко', 'Ковальчук', 'Шевченко', 'Щербатюк', 'Ямпольський', 'Підлубний',
+            'Клокун']
+NAMES = ['Петро', 'Олександр', 'Михайло', 'Іван', 'Сергій', 'Євген', 'Дмитро', 'Роман', 'Владислав', 'Всеволод']
+CATEGORIES = ['B', 'C', 'CE']
+DEPARTURES = ['Київ', 'Львів', 'Одеса', 'Харків', 'Дніпро']
+DESTINATIONS = ['Варшава', 'Берлін', 'Прага', 'Відень', 'Краків']
+STREETS = ['Хрещатик', 'Сумська', 'Дерибасівська', 'Європейська', 'Машинобудівників', 'Київська']
+CARGOS = ['Будматеріали', 'Металопрокат', 'Продукти', 'Техніка', 'Хімікати', 'Лікарські препарати', 'Нафтопродукти']
+SERVICE_DESCRIPTIONS = ['Планове ТО', 'Ремонт двигуна', 'Заміна шин', 'Ремонт гальм', 'Ремонт КПП']
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Таблиці, від яких залежить результат комплексного пошуку рейсів
+SEARCH_TABLES = ("trip", "car", "driver")
+
+
+# Генератори рядків (словники колонка -> значення) спільні для Model та AsyncModel.
+# Рядки створюються ліниво, тож у пам'яті одночасно є лише поточний пакет вставки.
+def car_rows(count):
+    for _ in range(count):
+        p1 = "".join(random.choices(LETTERS, k=2))
+        p2 = f"{random.randint(0, 9999):04d}"
+        p3 = "".join(random.choices(LETTERS, k=2))
+        yield dict(
+            vin=uuid.uuid4().hex[:17].upper(),
+            license_plate=f"{p1}{p2}{p3}",
+            brand=random.choice(BRANDS),
+            load_capacity=random.randint(10000, 25000)
+        )
+
+
+def driver_rows(count):
+    return (dict(
+        license_number=f"DR{random.randint(100000000000, 999999999999)}",
+        surname=random.choice(SURNAMES),
+        name=random.choice(NAMES),
+        license_category=random.choice(CATEGORIES)
+    ) for _ in range(count))
+
+
+def route_rows(count):
+    return (dict(
+        departure_point=random.choice(DEPARTURES),
+        destination_point=random.choice(DESTINATIONS),
+        distance_km=random.randint(300, 1500)
+    ) for _ in range(count))
+
+
+def customer_rows(count):
+    return (dict(
+        full_name=f"ТОВ {''.join(random.choices(LETTERS, k=3))}",
+        phone=f"+380{random.randint(100000000, 999999999)}",
+        email=f"{uuid.uuid4().hex[:10]}@gmail.com",
+        address=f"м. Київ, вул. {random.choice(STREETS)}, {random.randint(1, 100)}"
+    ) for _ in range(count))
+
+
+def trip_rows(count, car_ids, driver_ids, route_ids, customer_ids):
+    for _ in range(count):
+        dep_date = datetime.date.today() - datetime.timedelta(days=random.randint(0, 30))
+        arr_date = dep_date + datetime.timedelta(days=random.randint(1, 6))
+        ret_date = arr_date + datetime.timedelta(days=random.randint(1, 5))
+        yield dict(
+            departure_date=dep_date,
+            arrival_date=arr_date,
+            return_date=ret_date,
+            cargo_description=random.choice(CARGOS),
+            cargo_weight=random.randint(50, 250) * 100,
+            car_id=random.choice(car_ids),
+            driver_id=random.choice(driver_ids),
+            route_id=random.choice(route_ids),
+            customer_id=random.choice(customer_ids)
+        )
+
+
+def service_rows(count, car_ids):
+    return (dict(
+        car_id=random.choice(car_ids),
+        service_date=datetime.date.today() - datetime.timedelta(days=random.randint(0, 90)),
+        description=random.choice(SERVICE_DESCRIPTIONS),
+        cost=round(random.uniform(1000, 15000), 2)
+    ) for _ in range(count))
+
+
+# Денормалізована таблиця пошуку, яку створює й підтримує тригерами RGR/schema.py
+# (enable_search_table). До метаданих ORM вона не входить, тож міграції її не створюють.
+TRIP_SEARCH_TABLE = table(
+    "trip_search",
+    column("trip_id"),
+    column("cargo_description"),
+    column("cargo_weight"),
+    column("brand"),
+    column("license_plate"),
+    column("driver_full_name"),
+)
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+def trip_search_statement(min_weight, max_weight, brand_pattern, use_search_table=False):
+    if use_search_table:
+        s = TRIP_SEARCH_TABLE.c
+        return select(s.trip_id, s.cargo_description, s.cargo_weight, s.brand, s.license_plate, s.driver_full_name) \
+            .where(s.cargo_weight.between(min_weight, max_weight)) \
+            .where(s.brand.ilike(brand_pattern))
+    return select(
+        Trip.trip_id,
+        Trip.cargo_description,
+        Trip.cargo_weight,
+        Car.brand,
+        Car.license_plate,
+        (Driver.name + " " + Driver.surname).label("driver_full_name")
+    ).join(Trip.car).join(Trip.driver) \
+        .where(Trip.cargo_weight.between(min_weight, max_weight)) \
+        .where(Car.brand.ilike(brand_pattern))
+
+
+# Колонки сторінки: запитана проєкція (або всі колонки таблиці). Первинний ключ
+# і колонка сортування потрібні для keyset-межі, тому додаються, якщо їх не запитали:
+# ключ — на початок, колонка сортування — в кінець.
+def page_columns(model_class, columns=None, order_by=None):
+    table = model_class.__table__
+    key = table.primary_key.columns.values()[0].name
+    columns = list(columns) if columns else [c.name for c in table.columns]
+    if key not in columns:
+        columns.insert(0, key)
+    if order_by and order_by not in columns:
+        columns.append(order_by)
+    return columns
+
+
+def filter_value(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+# DELETE для delete_where. Умова: рівність (value), діапазон (min_value / max_value, межі включно)
+# або список (values); з batch_size — порція "WHERE pk IN (SELECT pk ... LIMIT n)".
+# Повертає (statement, None) або (None, повідомлення про помилку).
+def delete_statement(model_class, field, value=None, min_value=None, max_value=None, values=None,
+                     returning=False, batch_size=None):
+    if field not in model_class.__table__.columns:
+        return None, "Помилка: Неприпустима назва поля."
+
+    column = getattr(model_class, field)
+    if values is not None:
+        condition = column.in_([filter_value(v) for v in values])
+    elif min_value is not None or max_value is not None:
+        conditions = []
+        if min_value is not None:
+            conditions.append(column >= filter_value(min_value))
+        if max_value is not None:
+            conditions.append(column <= filter_value(max_value))
+        condition = sqlalchemy.and_(*conditions)
+    elif value is not None:
+        condition = column == filter_value(value)
+    else:
+        return None, "Помилка: Не задано умову видалення."
+
+    key = model_class.__mapper__.primary_key[0]
+    if batch_size:
+        condition = key.in_(select(key).where(condition).limit(batch_size).scalar_subquery())
+    statement = delete(model_class).where(condition).execution_options(synchronize_session=False)
+    if returning:
+        statement = statement.returning(key)
+    return statement, None
+
+
+# Порції, зафіксовані до помилки, не відкочуються — повідомлення називає їх кількість
+def delete_error(error, deleted):
+    if isinstance(error, IntegrityError):
+        message = "ПОМИЛКА: Видалення неможливе через зв'язки (Foreign Key)."
+    else:
+        message = f"Помилка: {error}"
+    if deleted:
+        message += f" Попередні порції ({deleted} рядків) вже видалено."
+    return message
+
+
+# Ключ кешу пошуку. ILIKE нечутливий до регістру, тож шаблони 'volvo%' і 'VOLVO%' дають один ключ
+def search_key(min_weight, max_weight, brand_pattern):
+    return int(min_weight), int(max_weight), brand_pattern.lower()
+
+
+# Keyset-пагінація: сторінка починається одразу після (after) або перед (before)
+# переданим рядком, тому вартість запиту не залежить від глибини сторінки.
+# Ключ сортування — (order_by, первинний ключ), щоб порядок був однозначним.
+# NULL-и в колонці сортування йдуть останніми (NULLS LAST, у зворотному напрямку — NULLS FIRST).
+# Вибираються лише колонки (Core select), без створення ORM-об'єктів.
+# Повертає ((statement, columns, descending), None) або (None, повідомлення про помилку).
+def page_statement(model_class, order_by=None, after=None, before=None, limit=PAGE_SIZE, columns=None):
+    table = model_class.__table__
+    key = table.primary_key.columns.values()[0].name
+    order_by = order_by or key
+    if order_by not in table.columns or any(col not in table.columns for col in columns or ()):
+        return None, "Помилка: Неприпустима назва поля."
+
+    columns = page_columns(model_class, columns, order_by)
+    sort = [order_by] if order_by == key else [order_by, key]
+    sort_columns = [table.c[col] for col in sort]
+    descending = after is None and before is not None
+
+    sort_column = sort_columns[0]
+    nullable = sort_column.nullable
+
+    statement = select(*[table.c[col] for col in columns])
+    boundary = after if after is not None else before
+    if boundary is not None:
+        values = [boundary[columns.index(col)] for col in sort]
+        boundary_key = tuple_(*values)
+        if nullable and values[0] is None:
+            # Порівняння кортежів з NULL дає NULL, тож рядки з NULL обробляються окремою гілкою
+            key_column = table.c[key]
+            if descending:
+                condition = or_(and_(sort_column.is_(None), key_column < values[1]), sort_column.is_not(None))
+            else:
+                condition = and_(sort_column.is_(None), key_column > values[1])
+        elif descending:
+            condition = tuple_(*sort_columns) < boundary_key
+        else:
+            condition = tuple_(*sort_columns) > boundary_key
+            if nullable:
+                condition = or_(condition, sort_column.is_(None))
+        statement = statement.where(condition)
+
+    order = [col.desc() for col in sort_columns] if descending else list(sort_columns)
+    if nullable:
+        order[0] = order[0].nulls_first() if descending else order[0].nulls_last()
+    return (statement.order_by(*order).limit(limit), columns, descending), None
 
 class Model:
     def __init__(self):
-        self.db = SessionLocal()
+        self.fk_sampler = FKSampler(self.session)
+        self.metrics = METRICS
+        self.search_cache = SearchCache(**SEARCH_CACHE)
+
+    # Сесія на одну операцію: identity map живе лише до кінця методу, тож об'єкти,
+    # завантажені чи створені за довгий інтерактивний сеанс, не накопичуються в пам'яті.
+    # Незафіксована транзакція відкочується при закритті.
+    @contextmanager
+    def session(self):
+        session = get_sessionmaker()()
+        try:
+            yield session
+        finally:
+            session.expunge_all()
+            session.close()
+
+    def ping(self):
+        with self.session() as session:
+            session.execute(text("SELECT 1"))
+
+    # Перевіряється при першому пошуку, тож створення моделі не відкриває з'єднання
+    @functools.cached_property
+    def use_search_table(self):
+        try:
+            with self.session() as session:
+                return bool(session.execute(text("SELECT to_regclass('trip_search') IS NOT NULL")).scalar())
+        except SQLAlchemyError:
+            return False
 
     def close_connection(self):
-        self.db.close()
+        get_engine().dispose()
+
+    # Після фіксації змін кешовані результати пошуку, що залежать від таблиці, скидаються
+    def _commit(self, session, table_name):
+        session.commit()
+        self.search_cache.invalidate(table_name)
 
     def _get_model_class(self, table_name):
-        mapping = {
-            'car': Car,
-            'driver': Driver,
-            'customer': Customer,
-            'route': Route,
-            'trip': Trip,
-            'service': Service
-        }
-        return mapping.get(table_name.lower())
-
-    def get_all_data(self, table_name):
+        return MODEL_CLASSES.get(table_name.lower())
+
+    def get_all_data(self, table_name, columns=None):
+        return self.get_page(table_name, columns=columns)
+
+    def page_columns(self, table_name, columns=None, order_by=None):
+        model_class = self._get_model_class(table_name)
+        return page_columns(model_class, columns, order_by) if model_class else None
+
+    def get_page(self, table_name, order_by=None, after=None, before=None, limit=PAGE_SIZE, columns=None):
         model_class = self._get_model_class(table_name)
         if not model_class:
             return None, "Помилка: Неприпустима назва таблиці."
 
-        try:
-            records = self.db.query(model_class).limit(100).all()
+        page, error = page_statement(model_class, order_by, after, before, limit, columns)
+        if error:
+            return None, error
 
-            result = []
-            columns = [c.name for c in model_class.__table__.columns]
-            for r in records:
-                row = tuple(getattr(r, col) for col in columns)
-                result.append(row)
+        statement, _, descending = page
+        try:
+            with self.session() as session:
+                result = [tuple(row) for row in session.execute(statement)]
+            if descending:
+                result.reverse()
             return result, "Запит успішно виконано."
         except SQLAlchemyError as e:
             return None, f"Помилка отримання даних: {e}"
@@ -53,16 +341,16 @@ class Model:
                 brand=brand,
                 load_capacity=int(load_capacity)
             )
-            self.db.add(car)
-            self.db.commit()
-            return f"Успішно додано автомобіль (ID: {car.car_id}).", True
+            with self.session() as session:
+                session.add(car)
+                self._commit(session, "car")
+                car_id = car.car_id
+            return f"Успішно додано автомобіль (ID: {car_id}).", True
         except ValueError:
             return "Помилка: Вантажопідйомність має бути числом.", False
         except IntegrityError:
-            self.db.rollback()
             return "Помилка: VIN або номер вже існують.", False
         except Exception as e:
-            self.db.rollback()
             return f"Помилка: {e}", False
 
     def add_driver(self, license_number, surname, name, license_category):
@@ -73,14 +361,14 @@ class Model:
                 name=name,
                 license_category=license_category
             )
-            self.db.add(driver)
-            self.db.commit()
-            return f"Успішно додано водія (ID: {driver.driver_id}).", True
+            with self.session() as session:
+                session.add(driver)
+                self._commit(session, "driver")
+                driver_id = driver.driver_id
+            return f"Успішно додано водія (ID: {driver_id}).", True
         except IntegrityError:
-            self.db.rollback()
             return "Помилка: Водій з таким номером вже існує.", False
         except Exception as e:
-            self.db.rollback()
             return f"Помилка: {e}", False
 
     def add_customer(self, full_name, phone, email, address):
@@ -91,14 +379,13 @@ class Model:
                 email=email,
                 address=address
             )
-            self.db.add(customer)
-            self.db.commit()
+            with self.session() as session:
+                session.add(customer)
+                self._commit(session, "customer")
             return "Успішно додано клієнта.", True
         except IntegrityError:
-            self.db.rollback()
             return "Помилка: Email вже зайнятий.", False
         except Exception as e:
-            self.db.rollback()
             return f"Помилка: {e}", False
 
     def add_route(self, departure, destination, distance):
@@ -108,13 +395,13 @@ class Model:
                 destination_point=destination,
                 distance_km=int(distance)
             )
-            self.db.add(route)
-            self.db.commit()
+            with self.session() as session:
+                session.add(route)
+                self._commit(session, "route")
             return "Успішно додано маршрут.", True
         except ValueError:
             return "Помилка: Відстань має бути числом.", False
         except Exception as e:
-            self.db.rollback()
             return f"Помилка: {e}", False
 
     def add_service(self, car_id, service_date, description, cost):
@@ -125,16 +412,15 @@ class Model:
                 description=description,
                 cost=float(cost)
             )
-            self.db.add(service)
-            self.db.commit()
+            with self.session() as session:
+                session.add(service)
+                self._commit(session, "service")
             return "Успішно додано запис про сервіс.", True
         except IntegrityError:
-            self.db.rollback()
             return "Помилка: Автомобіль з таким ID не існує.", False
         except ValueError:
             return "Помилка типів даних.", False
         except Exception as e:
-            self.db.rollback()
             return f"Помилка: {e}", False
 
     def add_trip(self, departure, arrival, return_d, cargo_desc, cargo_weight, car_id, driver_id, route_id,
@@ -151,36 +437,35 @@ class Model:
                 route_id=int(route_id),
                 customer_id=int(customer_id)
             )
-            self.db.add(trip)
-            self.db.commit()
+            with self.session() as session:
+                session.add(trip)
+                self._commit(session, "trip")
             return "Успішно додано рейс.", True
         except ValueError:
             return "Помилка: Введіть коректні числові дані.", False
         except IntegrityError as e:
-            self.db.rollback()
             return f"Помилка цілісності (перевірте ID): {e}", False
         except Exception as e:
-            self.db.rollback()
             return f"Помилка: {e}", False
 
+    # Один UPDATE ... WHERE pk = :id RETURNING pk лише зі зміненими колонками,
+    # без попереднього SELECT і без завантаження об'єкта в identity map.
     def _update_record(self, model_class, record_id, fields, values):
-        try:
-            record = self.db.query(model_class).get(record_id)
-            if not record:
-                return f"Запис з ID {record_id} не знайдено."
-
-            updated = False
-            for field, value in zip(fields, values):
-                if value:
-                    setattr(record, field, value)
-                    updated = True
-
-            if updated:
-                self.db.commit()
-                return f"Запис (ID: {record_id}) оновлено."
+        changes = {field: value for field, value in zip(fields, values) if value}
+        if not changes:
             return "Немає даних для оновлення."
+
+        key = model_class.__mapper__.primary_key[0]
+        try:
+            statement = update(model_class).where(key == record_id).values(changes).returning(key) \
+                .execution_options(synchronize_session=False)
+            with self.session() as session:
+                updated = session.execute(statement).scalar()
+                if updated is None:
+                    return f"Запис з ID {record_id} не знайдено."
+                self._commit(session, model_class.__tablename__)
+            return f"Запис (ID: {record_id}) оновлено."
         except Exception as e:
-            self.db.rollback()
             return f"Помилка оновлення: {e}"
 
     def update_car(self, car_id, brand, load_capacity):
@@ -218,204 +503,414 @@ class Model:
         except ValueError:
             return "Помилка числа."
 
+    # Умова за довільним полем може зачепити багато рядків, тож видалення йде порціями
+    # DELETE_BATCH_SIZE. Кожна порція фіксується окремо: якщо порція посередині порушує
+    # зовнішній ключ, попередні вже видалено, і повідомлення про помилку називає їх кількість.
     def delete_data_dynamic(self, table_name, field, value):
         model_class = self._get_model_class(table_name)
         if not model_class:
             return "Невірна таблиця."
 
-        try:
-            filter_value = int(value)
-        except ValueError:
-            filter_value = value
+        statement, error = delete_statement(model_class, field, value=value, batch_size=DELETE_BATCH_SIZE)
+        if error:
+            return error
+        _, count, error = self._delete_batches(model_class, statement, DELETE_BATCH_SIZE)
+        if error:
+            return error
+        if not count:
+            return f"0 rows affected (Запис {field}={value} не знайдено)."
+        return f"Deleted successfully! {count} рядків видалено."
+
+    # Set-based видалення одним DELETE ... WHERE без завантаження об'єктів у сесію (умову будує
+    # delete_statement). З batch_size видалення йде порціями з фіксацією після кожної, тож
+    # блокування рядків тримаються недовго. returning=True повертає список видалених id замість
+    # кількості. Якщо помилка сталася після вже зафіксованих порцій, замість None повертається
+    # кількість (id) видалених рядків разом з повідомленням про помилку.
+    def delete_where(self, table_name, field, value=None, min_value=None, max_value=None, values=None,
+                     returning=False, batch_size=None):
+        model_class = self._get_model_class(table_name)
+        if not model_class:
+            return None, "Помилка: Неприпустима назва таблиці."
 
+        statement, error = delete_statement(model_class, field, value, min_value, max_value, values, returning,
+                                            batch_size)
+        if error:
+            return None, error
+        deleted_ids, deleted, error = self._delete_batches(model_class, statement, batch_size, returning)
+        result = deleted_ids if returning else deleted
+        if error:
+            return (result if deleted else None), error
+        return result, f"Видалено {deleted} рядків з '{table_name}'."
+
+    # Повертає (id видалених рядків, кількість, повідомлення про помилку або None)
+    def _delete_batches(self, model_class, statement, batch_size, returning=False):
+        deleted_ids = []
+        deleted = 0
         try:
-            objs = self.db.query(model_class).filter(getattr(model_class, field) == filter_value).all()
+            with self.session() as session:
+                while True:
+                    result = session.execute(statement)
+                    if returning:
+                        batch = result.scalars().all()
+                        deleted_ids.extend(batch)
+                        count = len(batch)
+                    else:
+                        count = result.rowcount
+                    deleted += count
+                    self._commit(session, model_class.__tablename__)
+                    if not batch_size or count < batch_size:
+                        break
+        except Exception as e:
+            return deleted_ids, deleted, delete_error(e, deleted)
+        return deleted_ids, deleted, None
 
-            if not objs:
-                return f"0 rows affected (Запис {field}={value} не знайдено)."
+    def _cascade_plan(self, table_name, field, value):
+        model_class = self._get_model_class(table_name)
+        if not model_class:
+            return None, "Помилка: Неприпустима назва таблиці."
+        if field not in model_class.__table__.columns:
+            return None, "Помилка: Неприпустима назва поля."
 
-            count = len(objs)
-            for obj in objs:
-                self.db.delete(obj)
+        table = model_class.__table__
+        return cascade.plan_delete(table, table.c[field] == filter_value(value)), None
 
-            self.db.commit()
-            return f"Deleted successfully! {count} рядків видалено."
-        except IntegrityError:
-            self.db.rollback()
-            return "ПОМИЛКА: Видалення неможливе через зв'язки (Foreign Key)."
+    # Попередній перегляд каскадного видалення: скільки рядків буде видалено з кожної таблиці
+    def preview_delete_with_dependents(self, table_name, field, value):
+        steps, error = self._cascade_plan(table_name, field, value)
+        if error:
+            return None, error
+        try:
+            with self.session() as session:
+                counts = cascade.preview(session, steps)
+            return counts, "Попередній перегляд каскадного видалення."
+        except SQLAlchemyError as e:
+            return None, f"Помилка: {e}"
+
+    # Видаляє запис разом з усіма залежними (service, trip, ...) set-based запитами
+    # в одній транзакції: або все, або нічого.
+    def delete_with_dependents(self, table_name, field, value):
+        steps, error = self._cascade_plan(table_name, field, value)
+        if error:
+            return None, error
+        try:
+            with self.session() as session:
+                counts = cascade.execute(session, steps)
+                session.commit()
+        except SQLAlchemyError as e:
+            return None, f"Помилка каскадного видалення: {e}"
+
+        for name, _ in counts:
+            self.search_cache.invalidate(name)
+        total = sum(count for _, count in counts)
+        return counts, f"Deleted successfully! {total} рядків видалено разом із залежними."
+
+    # Пакетні операції виконуються в одній транзакції: кожна порція — executemany
+    # в окремій точці збереження (begin_nested). Якщо якийсь рядок порушує обмеження,
+    # порція ділиться навпіл, доки помилковий рядок не буде знайдено, а решта
+    # пакета все одно фіксується.
+    def _execute_batch(self, batches, done_message, missing_message):
+        results = {}
+        try:
+            with self.session() as session:
+                for run_chunk, items in batches:
+                    for start in range(0, len(items), BATCH_SIZE):
+                        self._execute_batch_chunk(session, run_chunk, items[start:start + BATCH_SIZE], results)
+                session.commit()
         except Exception as e:
-            self.db.rollback()
-            return f"Помилка: {e}"
+            return None, f"Помилка при виконанні пакета: {e}"
+
+        outcome = {}
+        for index, key in results.items():
+            if isinstance(key, SQLAlchemyError):
+                orig = getattr(key, "orig", None)
+                diag = getattr(orig, "diag", None)
+                outcome[index] = (False, f"Помилка: {diag.message_primary if diag else key}")
+            elif key is None:
+                outcome[index] = (False, missing_message)
+            else:
+                outcome[index] = (True, done_message.format(key))
+        return outcome, None
+
+    def _execute_batch_chunk(self, session, run_chunk, chunk, results):
+        try:
+            with session.begin_nested():
+                keys = run_chunk(session, [params for _, params in chunk])
+        except SQLAlchemyError as e:
+            if len(chunk) == 1:
+                results[chunk[0][0]] = e
+                return
+            middle = len(chunk) // 2
+            self._execute_batch_chunk(session, run_chunk, chunk[:middle], results)
+            self._execute_batch_chunk(session, run_chunk, chunk[middle:], results)
+            return
+
+        for (index, _), key in zip(chunk, keys):
+            results[index] = key
+
+    def _batch_report(self, table_name, outcome, rejected, done_message, missing_message, batches):
+        executed, error = self._execute_batch(batches, done_message, missing_message)
+        if error:
+            return None, error
+        if any(success for success, _ in executed.values()):
+            self.search_cache.invalidate(table_name)
+
+        executed.update(rejected)
+        results = [(index, success, message) for index, (success, message) in sorted(executed.items())]
+        succeeded = sum(1 for _, success, _ in results if success)
+        return results, f"{outcome}: {succeeded} з {len(results)} записів, з помилками {len(results) - succeeded}."
+
+    def add_many(self, table_name, records):
+        model_class = self._get_model_class(table_name)
+        if not model_class:
+            return None, "Помилка: Неприпустима назва таблиці."
 
-    def generate_cars(self, count):
-        brands = ['Volvo', 'MAN', 'Scania', 'Mercedes', 'DAF']
-        cars_to_add = []
+        table = model_class.__table__
+        key = table.primary_key.columns.values()[0]
+        columns = [c.name for c in table.columns if not c.primary_key]
+        items = []
+        rejected = {}
+        for index, record in enumerate(records):
+            if isinstance(record, dict):
+                if any(field not in columns for field in record):
+                    rejected[index] = (False, "Помилка: Неприпустима назва поля.")
+                    continue
+                items.append((index, {col: record.get(col) for col in columns}))
+            elif len(record) == len(columns):
+                items.append((index, dict(zip(columns, record))))
+            else:
+                rejected[index] = (False, f"Помилка: Очікується {len(columns)} значень.")
+
+        statement = insert(table).returning(key, sort_by_parameter_order=True)
+
+        def run_chunk(session, rows):
+            return session.execute(statement, rows).scalars().all()
+
+        return self._batch_report(table_name, "Додано", rejected, "Додано (ID: {}).", "Запис не додано.",
+                                  [(run_chunk, items)])
+
+    def add_cars(self, records):
+        return self.add_many("car", records)
+
+    def add_drivers(self, records):
+        return self.add_many("driver", records)
+
+    def add_customers(self, records):
+        return self.add_many("customer", records)
+
+    def add_routes(self, records):
+        return self.add_many("route", records)
+
+    def add_services(self, records):
+        return self.add_many("service", records)
+
+    def add_trips(self, records):
+        return self.add_many("trip", records)
+
+    # changes — послідовність пар (id, {поле: значення}); записи з однаковим набором
+    # полів групуються, і кожна порція групи оновлюється одним запитом
+    # "UPDATE ... FROM (VALUES ...) RETURNING pk". Відсутні id видно з RETURNING без
+    # окремого SELECT, а значення неприпустимого типу дає помилку саме цього запису.
+    def update_many(self, table_name, changes):
+        model_class = self._get_model_class(table_name)
+        if not model_class:
+            return None, "Помилка: Неприпустима назва таблиці."
+
+        table = model_class.__table__
+        key = table.primary_key.columns.values()[0]
+        columns = [c.name for c in table.columns if not c.primary_key]
+        groups = {}
+        rejected = {}
+        for index, (record_id, fields) in enumerate(changes):
+            if not fields:
+                rejected[index] = (False, "Немає даних для оновлення.")
+            elif any(field not in columns for field in fields):
+                rejected[index] = (False, "Помилка: Неприпустима назва поля.")
+            elif not str(record_id).isdigit():
+                rejected[index] = (False, "Помилка: ID має бути числом.")
+            else:
+                names = (key.name,) + tuple(sorted(fields))
+                groups.setdefault(names, []).append((index, (int(record_id),) + tuple(fields[n] for n in names[1:])))
+
+        def chunk_runner(names):
+            def run_chunk(session, rows):
+                data = sqlalchemy.values(*[column(name, table.c[name].type) for name in names],
+                                         name="changes").data(rows)
+                statement = update(table).where(key == data.c[key.name]) \
+                    .values({name: cast(data.c[name], table.c[name].type) for name in names[1:]}).returning(key)
+                updated = set(session.execute(statement).scalars())
+                return [row[0] if row[0] in updated else None for row in rows]
+            return run_chunk
+
+        return self._batch_report(table_name, "Оновлено", rejected, "Запис (ID: {}) оновлено.", "Запис не знайдено.",
+                                  [(chunk_runner(names), items) for names, items in groups.items()])
+
+    def update_cars(self, changes):
+        return self.update_many("car", changes)
+
+    def update_drivers(self, changes):
+        return self.update_many("driver", changes)
+
+    def update_customers(self, changes):
+        return self.update_many("customer", changes)
+
+    def update_routes(self, changes):
+        return self.update_many("route", changes)
+
+    def update_services(self, changes):
+        return self.update_many("service", changes)
+
+    def update_trips(self, changes):
+        return self.update_many("trip", changes)
+
+    def delete_many(self, table_name, ids):
+        model_class = self._get_model_class(table_name)
+        if not model_class:
+            return None, "Помилка: Неприпустима назва таблиці."
 
+        table = model_class.__table__
+        key = table.primary_key.columns.values()[0]
+        items = []
+        rejected = {}
+        for index, record_id in enumerate(ids):
+            if str(record_id).isdigit():
+                items.append((index, int(record_id)))
+            else:
+                rejected[index] = (False, "Помилка: ID має бути числом.")
+
+        def run_chunk(session, chunk_ids):
+            deleted = set(session.execute(delete(table).where(key.in_(chunk_ids)).returning(key)).scalars())
+            return [record_id if record_id in deleted else None for record_id in chunk_ids]
+
+        return self._batch_report(table_name, "Видалено", rejected, "Запис (ID: {}) видалено.", "Запис не знайдено.",
+                                  [(run_chunk, items)])
+
+    # Core INSERT з executemany: діалект psycopg групує рядки у багаторядкові
+    # INSERT ... VALUES (insertmanyvalues) без створення ORM-об'єктів. Рядки надходять
+    # пакетами по GENERATION_BATCH_SIZE, тож пам'ять не залежить від загальної кількості.
+    def _insert_rows(self, model_class, rows):
+        statement = insert(model_class.__table__)
+        with self.session() as session:
+            for batch in batches(rows, GENERATION_BATCH_SIZE):
+                session.execute(statement, batch)
+            self._commit(session, model_class.__tablename__)
+
+    def generate_cars(self, count):
         print(f"Генерація {count} автомобілів в Python...")
         try:
-            for _ in range(count):
-                vin = uuid.uuid4().hex[:17].upper()
-                p1 = "".join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=2))
-                p2 = f"{random.randint(0, 9999):04d}"
-                p3 = "".join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=2))
-                license_plate = f"{p1}{p2}{p3}"
-
-                cars_to_add.append(Car(
-                    vin=vin,
-                    license_plate=license_plate,
-                    brand=random.choice(brands),
-                    load_capacity=random.randint(10000, 25000)
-                ))
-
-            self.db.bulk_save_objects(cars_to_add)
-            self.db.commit()
-            return f"Успішно згенеровано {count} авто."
+            self._insert_rows(Car, car_rows(count))
+            return count, f"Успішно згенеровано {count} авто."
         except Exception as e:
-            self.db.rollback()
-            return f"Помилка генерації: {e}"
+            return None, f"Помилка генерації: {e}"
 
     def generate_drivers(self, count):
-        surnames = ['Іваненко', 'Петренко', 'Сидоренко', 'Ковальчук', 'Шевченко', 'Щербатюк', 'Ямпольський', 'Підлубний', 'Клокун']
-        names = ['Петро', 'Олександр', 'Михайло', 'Іван', 'Сергій', 'Євген', 'Дмитро', 'Роман', 'Владислав', 'Всеволод']
-        categories = ['B', 'C', 'CE']
-        drivers_to_add = []
-
         try:
-            for _ in range(count):
-                drivers_to_add.append(Driver(
-                    license_number=f"DR{random.randint(100000, 999999)}",
-                    surname=random.choice(surnames),
-                    name=random.choice(names),
-                    license_category=random.choice(categories)
-                ))
-
-            self.db.bulk_save_objects(drivers_to_add)
-            self.db.commit()
-            return f"Успішно згенеровано {count} водіїв."
+            self._insert_rows(Driver, driver_rows(count))
+            return count, f"Успішно згенеровано {count} водіїв."
         except Exception as e:
-            self.db.rollback()
-            return f"Помилка генерації: {e}"
+            return None, f"Помилка генерації: {e}"
 
     def generate_routes(self, count):
-        deps = ['Київ', 'Львів', 'Одеса', 'Харків', 'Дніпро']
-        dests = ['Варшава', 'Берлін', 'Прага', 'Відень', 'Краків']
-        routes_to_add = []
-
         try:
-            for _ in range(count):
-                routes_to_add.append(Route(
-                    departure_point=random.choice(deps),
-                    destination_point=random.choice(dests),
-                    distance_km=random.randint(300, 1500)
-                ))
-            self.db.bulk_save_objects(routes_to_add)
-            self.db.commit()
-            return f"Успішно згенеровано {count} маршрутів."
+            self._insert_rows(Route, route_rows(count))
+            return count, f"Успішно згенеровано {count} маршрутів."
         except Exception as e:
-            self.db.rollback()
-            return f"Помилка: {e}"
+            return None, f"Помилка: {e}"
 
     def generate_customers(self, count):
-        streets = ['Хрещатик', 'Сумська', 'Дерибасівська', 'Європейська', 'Машинобудівників', 'Київська']
-        customers_to_add = []
-
         try:
-            for _ in range(count):
-                suffix = "".join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=3))
-                customers_to_add.append(Customer(
-                    full_name=f"ТОВ {suffix}",
-                    phone=f"+380{random.randint(100000000, 999999999)}",
-                    email=f"{uuid.uuid4().hex[:10]}@gmail.com",
-                    address=f"м. Київ, вул. {random.choice(streets)}, {random.randint(1, 100)}"
-                ))
-            self.db.bulk_save_objects(customers_to_add)
-            self.db.commit()
-            return f"Успішно згенеровано {count} клієнтів."
+            self._insert_rows(Customer, customer_rows(count))
+            return count, f"Успішно згенеровано {count} клієнтів."
         except Exception as e:
-            self.db.rollback()
-            return f"Помилка: {e}"
+            return None, f"Помилка: {e}"
 
     def generate_trips(self, count):
 
         try:
-            car_ids = [r[0] for r in self.db.query(Car.car_id).all()]
-            driver_ids = [r[0] for r in self.db.query(Driver.driver_id).all()]
-            route_ids = [r[0] for r in self.db.query(Route.route_id).all()]
-            customer_ids = [r[0] for r in self.db.query(Customer.customer_id).all()]
+            car_ids = self.fk_sampler.ids(Car.car_id)
+            driver_ids = self.fk_sampler.ids(Driver.driver_id)
+            route_ids = self.fk_sampler.ids(Route.route_id)
+            customer_ids = self.fk_sampler.ids(Customer.customer_id)
 
             if not all([car_ids, driver_ids, route_ids, customer_ids]):
-                return "Помилка: Батьківські таблиці порожні. Спочатку згенеруйте їх."
-
-            trips_to_add = []
-            cargos = ['Будматеріали', 'Металопрокат', 'Продукти', 'Техніка', 'Хімікати', 'Лікарські препарати', 'Нафтопродукти']
+                return None, "Помилка: Батьківські таблиці порожні. Спочатку згенеруйте їх."
 
             print(f"Генерація {count} рейсів...")
-            for _ in range(count):
-                dep_date = datetime.date.today() - datetime.timedelta(days=random.randint(0, 30))
-                arr_date = dep_date + datetime.timedelta(days=random.randint(1, 6))
-                ret_date = arr_date + datetime.timedelta(days=random.randint(1, 5))
-
-                trips_to_add.append(Trip(
-                    departure_date=dep_date,
-                    arrival_date=arr_date,
-                    return_date=ret_date,
-                    cargo_description=random.choice(cargos),
-                    cargo_weight=random.randint(50, 250) * 100,
-                    car_id=random.choice(car_ids),
-                    driver_id=random.choice(driver_ids),
-                    route_id=random.choice(route_ids),
-                    customer_id=random.choice(customer_ids)
-                ))
-
-            self.db.bulk_save_objects(trips_to_add)
-            self.db.commit()
-            return f"Успішно згенеровано {count} рейсів."
+            self._insert_rows(Trip, trip_rows(count, car_ids, driver_ids, route_ids, customer_ids))
+            return count, f"Успішно згенеровано {count} рейсів."
         except Exception as e:
-            self.db.rollback()
-            return f"Помилка генерації рейсів: {e}"
+            return None, f"Помилка генерації рейсів: {e}"
 
     def generate_service(self, count):
         try:
-            car_ids = [r[0] for r in self.db.query(Car.car_id).all()]
-            if not car_ids: return "Немає авто."
-
-            desc_opts = ['Планове ТО', 'Ремонт двигуна', 'Заміна шин', 'Ремонт гальм', 'Ремонт КПП']
-            services_to_add = []
-
-            for _ in range(count):
-                services_to_add.append(Service(
-                    car_id=random.choice(car_ids),
-                    service_date=datetime.date.today() - datetime.timedelta(days=random.randint(0, 90)),
-                    description=random.choice(desc_opts),
-                    cost=round(random.uniform(1000, 15000), 2)
-                ))
-
-            self.db.bulk_save_objects(services_to_add)
-            self.db.commit()
-            return f"Успішно згенеровано {count} сервісних записів."
+            car_ids = self.fk_sampler.ids(Car.car_id)
+            if not car_ids:
+                return None, "Помилка: Немає авто. Спочатку згенеруйте 'car'."
+
+            self._insert_rows(Service, service_rows(count, car_ids))
+            return count, f"Успішно згенеровано {count} сервісних записів."
         except Exception as e:
-            self.db.rollback()
-            return f"Помилка: {e}"
+            return None, f"Помилка: {e}"
 
     def search_trips_complex(self, min_weight, max_weight, brand_pattern):
         try:
-            start_time = time.time()
-
-            results = self.db.query(
-                Trip.trip_id,
-                Trip.cargo_description,
-                Trip.cargo_weight,
-                Car.brand,
-                Car.license_plate,
-                (Driver.name + " " + Driver.surname).label("driver_full_name")
-            ).join(Trip.car).join(Trip.driver) \
-                .filter(Trip.cargo_weight.between(min_weight, max_weight)) \
-                .filter(Car.brand.ilike(brand_pattern)) \
-                .all()
-
-            end_time = time.time()
-            duration_ms = (end_time - start_time) * 1000
+            start_time = time.perf_counter()
+            key = search_key(min_weight, max_weight, brand_pattern)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return list(cached), (time.perf_counter() - start_time) * 1000, "Пошук успішний (з кешу)."
 
+            generation = self.search_cache.generation(SEARCH_TABLES)
+            start_time = time.perf_counter()
+
+            statement = trip_search_statement(min_weight, max_weight, brand_pattern, self.use_search_table)
+            with self.session() as session:
+                results = session.execute(statement).all()
+
+            duration_ms = (time.perf_counter() - start_time) * 1000
+
+            self.search_cache.put(key, tuple(results), SEARCH_TABLES, generation)
             return results, duration_ms, "Пошук успішний."
         except Exception as e:
-            return None, 0, f"Помилка пошуку: {e}"
\ No newline at end of file
+            return None, 0, f"Помилка пошуку: {e}"
+
+    # Рядки потоку накопичуються, доки їх не більше max_rows; повністю прочитаний
+    # результат кладеться в кеш, якщо за цей час не було запису в залежні таблиці.
+    def _cache_stream(self, key, generation, rows):
+        collected = []
+        for row in rows:
+            if collected is not None:
+                collected.append(row)
+                if len(collected) > self.search_cache.max_rows:
+                    collected = None
+            yield row
+        if collected is not None:
+            self.search_cache.put(key, tuple(collected), SEARCH_TABLES, generation)
+
+    # Серверний курсор (yield_per) живе, доки споживач не вичерпає або не закриє генератор;
+    # сесія закривається разом з ним.
+    def _stream_rows(self, statement):
+        with self.session() as session:
+            yield from session.execute(statement.execution_options(yield_per=STREAM_ITERSIZE))
+
+    # yield_per вмикає серверний курсор (stream_results): рядки надходять пакетами,
+    # тож пам'ять не залежить від розміру результату.
+    def stream_trips_complex(self, min_weight, max_weight, brand_pattern):
+        try:
+            start_time = time.perf_counter()
+            key = search_key(min_weight, max_weight, brand_pattern)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return iter(cached), (time.perf_counter() - start_time) * 1000, "Пошук успішний (з кешу)."
+
+            generation = self.search_cache.generation(SEARCH_TABLES)
+            start_time = time.perf_counter()
+            statement = trip_search_statement(min_weight, max_weight, brand_pattern, self.use_search_table)
+            rows = self._cache_stream(key, generation, self._stream_rows(statement))
+            first_row = next(rows, None)
+            duration_ms = (time.perf_counter() - start_time) * 1000
+        except Exception as e:
+            return None, 0, f"Помилка пошуку: {e}"
+
+        if first_row is None:
+            return iter(()), duration_ms, "Пошук успішний."
+        return itertools.chain([first_row], rows), duration_ms, "Пошук успішний."
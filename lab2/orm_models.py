@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Numeric, Float
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Numeric, Float, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -16,6 +16,12 @@ class Car(Base):
     trips = relationship("Trip", back_populates="car")
     services = relationship("Service", back_populates="car")
 
+    # Назви індексів збігаються з RGR/schema.py, щоб обидва застосунки не дублювали їх
+    # Розширення pg_trgm для триграмного індексу створює міграція 2 (migrations.py)
+    __table_args__ = (
+        Index("car_brand_trgm_idx", "brand", postgresql_using="gin", postgresql_ops={"brand": "gin_trgm_ops"}),
+    )
+
 
 class Driver(Base):
     __tablename__ = 'driver'
@@ -72,6 +78,16 @@ class Trip(Base):
     route = relationship("Route", back_populates="trips")
     customer = relationship("Customer", back_populates="trips")
 
+    __table_args__ = (
+        Index("trip_car_id_idx", "car_id"),
+        Index("trip_driver_id_idx", "driver_id"),
+        Index("trip_route_id_idx", "route_id"),
+        Index("trip_customer_id_idx", "customer_id"),
+        # Покривний індекс для діапазону ваги в комплексному пошуку (з trip_id — для index-only scan)
+        Index("trip_cargo_weight_cover_idx", "cargo_weight",
+              postgresql_include=["trip_id", "car_id", "driver_id", "cargo_description"]),
+    )
+
 
 class Service(Base):
     __tablename__ = 'service'
@@ -82,4 +98,8 @@ class Service(Base):
     description = Column(String(200), nullable=False)
     cost = Column(Numeric(10, 2), nullable=False)
 
-    car = relationship("Car", back_populates="services")
\ No newline at end of file
+    car = relationship("Car", back_populates="services")
+
+    __table_args__ = (
+        Index("service_car_id_idx", "car_id"),
+    )
\ No newline at end of file
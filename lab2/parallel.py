@@ -0,0 +1,41 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from model import Model
+
+
+def split_count(count, workers):
+    base, extra = divmod(count, workers)
+    return [base + (1 if i < extra else 0) for i in range(workers)]
+
+
+# Виконується в окремому процесі: власна модель і власне з'єднання з БД,
+# кожен процес генерує та завантажує свою частину в окремій транзакції.
+def _generate_chunk(method_name, count):
+    model = Model()
+    try:
+        return getattr(model, method_name)(count)
+    finally:
+        model.close_connection()
+
+
+def generate_parallel(method_name, count, workers):
+    workers = max(1, min(workers, count))
+    chunks = split_count(count, workers)
+
+    start_time = time.perf_counter()
+    # spawn, а не fork: дочірні процеси не успадковують з'єднань батьківського
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        results = list(executor.map(_generate_chunk, [method_name] * workers, chunks))
+    duration = time.perf_counter() - start_time
+
+    # Невдалий процес (None) не додає рядків, тож неповна генерація видна з суми
+    generated = sum(rowcount or 0 for rowcount, _ in results)
+    rate = generated / duration if duration > 0 else 0
+    lines = [f"Процес {i} ({chunk} записів): {message}"
+             for i, (chunk, (_, message)) in enumerate(zip(chunks, results), 1)]
+    lines.append(f"Паралельна генерація: {workers} процесів, {generated} з {count} записів, "
+                 f"{duration:.2f} с ({rate:.0f} рядків/с).")
+    return generated, "\n".join(lines)